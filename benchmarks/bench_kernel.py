@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""Benchmark interactive kernel paths with synthetic keyword catalogs.
+
+Builds RobotKernel equivalent catalogs with 1k, 10k and 50k keywords and a
+notebook history, and times completion and inspection without frontend.
+
+Usage: python benchmarks/bench_kernel.py [--sizes 1000,10000] [--output FILE]
+"""
+from robot.libdocpkg.model import KeywordDoc
+from robotkernel.index import CompletionCache
+from robotkernel.index import SearchIndex
+from robotkernel.index import VariablesIndex
+from robotkernel.kernel import RobotKernel
+from robotkernel.libdocs import KeywordRecord
+from robotkernel.libdocs import LibraryRecord
+from robotkernel.listeners import RobotKeywordsIndexerListener
+from robotkernel.utils import get_keyword_completions
+from robotkernel.utils import scored_results
+import argparse
+import json
+import logging
+import platform
+import random
+import robot
+import statistics
+import sys
+import time
+import tracemalloc
+import types
+
+
+WORDS = """\
+open close click element browser page should contain wait until get set
+text input select frame window button list value title cookie alert table
+cell row column file directory create remove copy move log variable string
+number convert dictionary item key match regexp count length verify
+""".split()
+
+CELL = """\
+*** Variables ***
+
+${{URL_{idx}}}  http://localhost:{idx}/
+@{{ITEMS_{idx}}}  first  second
+
+*** Tasks ***
+
+Task {idx}
+    ${{value_{idx}}}=  Get Text  id:element-{idx}
+    Should contain  ${{value_{idx}}}  ${{URL_{idx}}}
+"""
+
+
+def create_kernel(size, cells=50, seed=0):
+    """Return object with the state RobotKernel methods depend on."""
+    rnd = random.Random(seed)
+    catalog = {"index": SearchIndex(), "libraries": []}
+    listener = RobotKeywordsIndexerListener(catalog)
+    libraries = max(1, size // 200)
+    for library in range(libraries):
+        keywords = []
+        for idx in range(size // libraries):
+            name = " ".join(rnd.sample(WORDS, rnd.randint(2, 4))).capitalize()
+            doc = " ".join(rnd.choice(WORDS) for _ in range(60))
+            keywords.append(KeywordDoc(name=f"{name} {idx}", args=["arg"], doc=doc))
+        # noinspection PyProtectedMember
+        listener._library_import(keywords, f"Library{library}")
+    variables = VariablesIndex()
+    for idx in range(cells):
+        variables.update(str(idx), CELL.format(idx=idx))
+    return types.SimpleNamespace(
+        robot_catalog=catalog,
+        robot_completions=CompletionCache(catalog["index"]),
+        robot_variables=variables,
+        robot_suite_variables={"${TEMPDIR}": "/tmp", "${SUITE_NAME}": "Suite"},
+        robot_connections=[],
+        robot_inspect_data={},
+        log=logging.getLogger("benchmark"),
+    )
+
+
+def measure_memory(factory):
+    """Return kilobytes allocated for the object returned by factory."""
+    tracemalloc.start()
+    try:
+        value = factory()
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del value
+    return size / 1024
+
+
+def keyword_docs(size, seed=0):
+    rnd = random.Random(seed)
+    for idx in range(size):
+        name = " ".join(rnd.sample(WORDS, rnd.randint(2, 4))).capitalize()
+        doc = " ".join(rnd.choice(WORDS) for _ in range(60))
+        yield KeywordDoc(name=f"{name} {idx}", args=["arg"], doc=doc)
+
+
+def keyword_records(size):
+    # Keyword records of a library with documentation loaded on demand
+    library = LibraryRecord("Library", "Library")
+    return [
+        KeywordRecord(keyword.name, keyword.args, library)
+        for keyword in keyword_docs(size)
+    ]
+
+
+def measure(func, repeat=20):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "repeat": repeat,
+    }
+
+
+def type_keystrokes(kernel, code):
+    # Completion requests for every keystroke of the last line
+    line_start = code.rfind("\n") + 1
+    for cursor_pos in range(line_start + 5, len(code) + 1):
+        RobotKernel.do_complete(kernel, code[:cursor_pos], cursor_pos)
+
+
+def benchmark(size):
+    started = time.perf_counter()
+    kernel = create_kernel(size)
+    results = {"build_catalog_ms": (time.perf_counter() - started) * 1000}
+    results["catalog_memory_kb"] = {
+        "keyword_docs": measure_memory(lambda: list(keyword_docs(size))),
+        "keyword_records": measure_memory(lambda: keyword_records(size)),
+    }
+    index = kernel.robot_catalog["index"]
+    keyword = index[index.search("click")[0]].name
+    task = "*** Tasks ***\n\nTask\n    "
+    candidates = [{"ref": ref} for ref in index.search("element")]
+
+    results["do_complete"] = measure(
+        lambda: RobotKernel.do_complete(kernel, task + "Click ele", None)
+    )
+    results["do_complete_keystrokes"] = measure(
+        lambda: type_keystrokes(kernel, task + "Click element"), repeat=5
+    )
+    results["do_complete_variables"] = measure(
+        lambda: RobotKernel.do_complete(kernel, task + "Log  ${URL_1", None)
+    )
+    results["do_inspect"] = measure(
+        lambda: RobotKernel.do_inspect(kernel, task + keyword, None)
+    )
+    results["search"] = {
+        query: measure(lambda: index.search(query))
+        for query in ["c", "click ele", "wait until"]
+    }
+    results["get_keyword_completions"] = measure(
+        lambda: get_keyword_completions("click ele", index, "__tasks__")
+    )
+    results["scored_results"] = measure(lambda: scored_results("element", candidates))
+    results["scored_results_candidates"] = len(candidates)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,50000")
+    parser.add_argument("--output", help="JSON file (defaults to stdout)")
+    args = parser.parse_args(argv)
+    report = {
+        "python": platform.python_version(),
+        "robotframework": robot.__version__,
+        "platform": platform.platform(),
+        "results": {
+            size: benchmark(int(size)) for size in args.sizes.split(",") if size
+        },
+    }
+    if args.output:
+        with open(args.output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
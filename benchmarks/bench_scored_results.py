@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Benchmark scored_results against the previous difflib based ranking.
+
+Usage: python benchmarks/bench_scored_results.py
+"""
+from copy import deepcopy
+from difflib import SequenceMatcher
+from operator import itemgetter
+from robotkernel.utils import scored_results
+import random
+import timeit
+
+
+WORDS = ["open", "close", "click", "element", "browser", "page", "should"]
+WORDS += ["contain", "wait", "until", "get", "set", "text", "input", "select"]
+
+
+def legacy_scored_results(needle, results):
+    results = deepcopy(results)
+    for result in results:
+        match = SequenceMatcher(
+            None, needle.lower(), result["ref"].lower(), autojunk=False
+        ).find_longest_match(0, len(needle), 0, len(result["ref"]))
+        result["score"] = (match.size, match.size / float(len(result["ref"])))
+    return list(reversed(sorted(results, key=itemgetter("score"))))
+
+
+def main():
+    rnd = random.Random(0)
+    for count in [100, 1000, 10000]:
+        results = [
+            {"ref": f"Library{idx % 50}." + " ".join(rnd.sample(WORDS, 3)).title()}
+            for idx in range(count)
+        ]
+        for needle in ["op", "Wait Until"]:
+            timings = []
+            for function in [
+                lambda: legacy_scored_results(needle, results),
+                lambda: scored_results(needle, results),
+                lambda: scored_results(needle, results, limit=20),
+            ]:
+                number = max(1, 10000 // count)
+                timings.append(timeit.timeit(function, number=number) / number)
+            print(
+                f"{count:>6} results, needle {needle!r:>12}: "
+                f"legacy {timings[0] * 1000:8.2f} ms, "
+                f"current {timings[1] * 1000:8.2f} ms, "
+                f"top 20 {timings[2] * 1000:8.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
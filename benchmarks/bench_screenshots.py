@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Benchmark screenshot processing of results with 1, 50 and 500 screenshots.
+
+Usage: python benchmarks/bench_screenshots.py
+"""
+from PIL import Image
+from robot.result import Result
+from robotkernel.executors import process_screenshots
+from tempfile import TemporaryDirectory
+import os
+import time
+
+
+class ByteCountingKernel:
+    """Kernel counting the length of displayed data."""
+
+    def __init__(self):
+        self.sent = 0
+
+    def send_display_data(self, data=None, metadata=None, display_id=None):
+        self.sent += sum(len(value) for value in data.values())
+
+
+def create_result(path, count):
+    result = Result()
+    test = result.suite.tests.create(name="Screenshots")
+    for idx in range(count):
+        filename = f"selenium-screenshot-{idx}.png"
+        im = Image.new("RGB", (1280, 800), (idx % 256, 128, 255))
+        im.putpixel((0, 0), (idx % 256, idx // 256 % 256, 0))
+        im.save(os.path.join(path, filename), compress_level=1)
+        keyword = test.keywords.create(kwname="Capture Page Screenshot")
+        keyword.messages.create(f"Logging {idx}", level="INFO")
+        keyword.messages.create(
+            f'</td></tr><tr><td colspan="3"><a href="{filename}">'
+            f'<img src="{filename}" width="800px"></a>',
+            level="INFO",
+            html=True,
+        )
+    return result
+
+
+def main():
+    for count in [1, 50, 500]:
+        with TemporaryDirectory() as path:
+            result = create_result(path, count)
+            kernel = ByteCountingKernel()
+            started = time.perf_counter()
+            process_screenshots(kernel, result, path, False)
+            elapsed = time.perf_counter() - started
+        print(
+            f"{count:>4} screenshots: {elapsed * 1000:10.2f} ms "
+            f"({kernel.sent // 1024} KiB displayed)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ from robotkernel.constants import HAS_RF32_PARSER
 
 if HAS_RF32_PARSER:
     from robotkernel.builders_32 import build_suite
+    from robotkernel.builders_32 import ResourceModel
 else:
     from robotkernel.builders_31 import build_suite
+    from robotkernel.builders_31 import ResourceModel
 
 assert build_suite
+assert ResourceModel
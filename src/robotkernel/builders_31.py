@@ -17,7 +17,24 @@ import os
 import platform
 
 
-def build_suite(code: str, cell_history: Dict[str, str]):
+class ResourceModel:
+    """History is always fully replayed with RF31 parser."""
+
+    def remove(self, cell_id: str):
+        pass
+
+    # noinspection PyUnusedLocal
+    def get_setting_source(self, name: str, code: str, cell_id: str = None):
+        return None
+
+
+# noinspection PyUnusedLocal
+def build_suite(
+    code: str,
+    cell_history: Dict[str, str],
+    model: ResourceModel = None,
+    cell_id: str = None,
+):
     # Init
     data = TestCaseString()
     data.source = os.getcwd()  # allow Library and Resource from CWD work
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 from io import StringIO
 from robot.api import get_model
 from robot.errors import DataError
@@ -8,9 +9,15 @@ from robot.running.builder.transformers import SettingsBuilder
 from robot.running.builder.transformers import SuiteBuilder
 from robot.running.model import TestSuite
 from typing import Dict
+import hashlib
+import itertools
 import os
 
 
+IMPORT_SETTINGS = ("LibraryImport", "ResourceImport", "VariablesImport")
+DEFINITION_KINDS = ("settings", "imports", "keywords", "variables")
+
+
 def _get_rpa_mode(data):
     if not data:
         return None
@@ -24,46 +31,185 @@ def _get_rpa_mode(data):
 # https://github.com/robotframework/robotframework/commit/fa024345cb58d154e1d8384552b62788d3ed6258
 
 
-def build_suite(code: str, cell_history: Dict[str, str], data_only: bool = False):
-    # Init
-    suite = TestSuite(name="Jupyter", source=os.getcwd())
-    defaults = TestDefaults(None)
-
-    # Populate history
-    for historical in cell_history.values():
-        ast = get_model(
-            StringIO(historical),
-            data_only=data_only,
-            curdir=os.getcwd().replace("\\", "\\\\"),
-        )
-        ErrorReporter(historical).visit(ast)
-        SettingsBuilder(suite, defaults).visit(ast)
-        SuiteBuilder(suite, defaults).visit(ast)
-
-    # Clear historical tests
-    suite.tests._items = []
-
-    # Populate current
-    ast = get_model(
-        StringIO(code), data_only=data_only, curdir=os.getcwd().replace("\\", "\\\\")
-    )
+def get_cell_model(
+    code: str, data_only: bool = False, models: dict = None, cell_id: str = None
+):
+    """Return parsed AST for cell code, reusing the cached model when the
+    cell with the given id has not changed since it was last parsed.
+    """
+    curdir = os.getcwd().replace("\\", "\\\\")
+    key = (hashlib.sha1(code.encode("utf-8")).hexdigest(), data_only, curdir)
+    if models is not None and cell_id is not None:
+        cached = models.get(cell_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+    ast = get_model(StringIO(code), data_only=data_only, curdir=curdir)
     ErrorReporter(code).visit(ast)
-    SettingsBuilder(suite, defaults).visit(ast)
-    SuiteBuilder(suite, defaults).visit(ast)
+    if models is not None and cell_id is not None:
+        models[cell_id] = (key, ast)
+    return ast
+
+
+class DefinitionsBuilder(SuiteBuilder):
+    """Collect suite settings, imports, keywords and variables of a cell."""
+
+    def __init__(self, suite, test_defaults):
+        super(DefinitionsBuilder, self).__init__(suite, test_defaults)
+        self.settings = OrderedDict()
+        self.imports = OrderedDict()
+
+    def visit_SettingSection(self, node):
+        for statement in node.body:
+            name = statement.__class__.__name__
+            if name in IMPORT_SETTINGS:
+                key = (
+                    name,
+                    statement.name,
+                    tuple(getattr(statement, "args", ())),
+                    getattr(statement, "alias", None),
+                )
+                self.imports[key] = statement
+            elif name == "Metadata":
+                self.settings[(name, statement.name)] = statement
+            elif hasattr(SettingsBuilder, f"visit_{name}"):
+                self.settings[name] = statement
+
+    def visit_TestCase(self, node):
+        pass
+
+
+def get_cell_definitions(ast):
+    suite = TestSuite(name="Jupyter", source=os.getcwd())
+    builder = DefinitionsBuilder(suite, TestDefaults(None))
+    builder.visit(ast)
+    return {
+        "settings": builder.settings,
+        "imports": builder.imports,
+        "keywords": OrderedDict((k.name, k) for k in suite.resource.keywords),
+        "variables": OrderedDict((v.name, v) for v in suite.resource.variables),
+    }
+
+
+class ResourceModel:
+    """Live suite settings, imports, keywords and variables of notebook cell
+    history, keyed by the defining cell and patched per changed cell.
+    """
+
+    def __init__(self, data_only: bool = False):
+        self.data_only = data_only
+        self.models = {}  # parsed cell models by cell id
+        self.cells = {}  # cell code and definitions by cell id
+        self.order = {}  # cell execution order by cell id
+        self.counter = itertools.count()
+        self.definitions = {kind: {} for kind in DEFINITION_KINDS}
+        self.current = {kind: OrderedDict() for kind in DEFINITION_KINDS}
+
+    def _refresh(self, kind, name):
+        cells = self.definitions[kind].get(name)
+        if cells:
+            cell_id = max(cells, key=self.order.get)
+            self.current[kind][name] = cells[cell_id]
+        else:
+            self.definitions[kind].pop(name, None)
+            self.current[kind].pop(name, None)
+
+    def update(self, cell_id: str, code: str):
+        ast = get_cell_model(code, self.data_only, self.models, cell_id)
+        definitions = get_cell_definitions(ast)
+        self.remove(cell_id, forget=False)
+        self.cells[cell_id] = (code, definitions)
+        self.order.setdefault(cell_id, next(self.counter))
+        for kind in DEFINITION_KINDS:
+            for name, item in definitions[kind].items():
+                self.definitions[kind].setdefault(name, {})[cell_id] = item
+                self._refresh(kind, name)
+
+    def remove(self, cell_id: str, forget: bool = True):
+        if cell_id in self.cells:
+            code, definitions = self.cells.pop(cell_id)
+            for kind in DEFINITION_KINDS:
+                for name in definitions[kind]:
+                    self.definitions[kind][name].pop(cell_id, None)
+                    self._refresh(kind, name)
+        if forget:
+            self.models.pop(cell_id, None)
+            self.order.pop(cell_id, None)
+
+    def sync(self, cell_history: Dict[str, str]):
+        """Patch the model to match the given cell history."""
+        for cell_id in [c for c in self.cells if c not in cell_history]:
+            self.remove(cell_id)
+        for cell_id, code in cell_history.items():
+            cached = self.cells.get(cell_id)
+            if cached is None or cached[0] != code:
+                self.update(cell_id, code)
+
+    def get_setting_source(self, name: str, code: str, cell_id: str = None):
+        """Return id and code of the cell defining the value of the named
+        suite setting for the given code.
+        """
+        ast = get_cell_model(code, self.data_only, self.models, cell_id)
+        if name in get_cell_definitions(ast)["settings"]:
+            return cell_id, code
+        cells = self.definitions["settings"].get(name)
+        if cells:
+            cell_id = max(cells, key=self.order.get)
+            return cell_id, self.cells[cell_id][0]
+        return None
+
+    def build_suite(self, code: str, cell_id: str = None):
+        """Return new suite with current definitions overridden by the code
+        and with only the tests of the code.
+        """
+        suite = TestSuite(name="Jupyter", source=os.getcwd())
+        defaults = TestDefaults(None)
+        ast = get_cell_model(code, self.data_only, self.models, cell_id)
+        definitions = get_cell_definitions(ast)
+
+        # Settings and imports
+        settings = SettingsBuilder(suite, defaults)
+        for kind in ["settings", "imports"]:
+            current = self.current[kind].copy()
+            current.update(definitions[kind])
+            for statement in current.values():
+                settings.visit(statement)
+
+        # Keywords and variables
+        for kind, items in [
+            ("keywords", suite.resource.keywords),
+            ("variables", suite.resource.variables),
+        ]:
+            current = self.current[kind].copy()
+            current.update(definitions[kind])
+            items.extend(current.values())
+
+        # Tests
+        TestsBuilder(suite, defaults).visit(ast)
+
+        # Detect RPA
+        suite.rpa = _get_rpa_mode(ast)
+
+        return suite
+
+
+class TestsBuilder(SuiteBuilder):
+    """Build only the tests of a cell."""
 
-    # Strip duplicate keywords
-    keywords = {}
-    for keyword in suite.resource.keywords:
-        keywords[keyword.name] = keyword
-    suite.resource.keywords._items = list(keywords.values())
+    def visit_Variable(self, node):
+        pass
 
-    # Strip duplicate variables
-    variables = {}
-    for variable in suite.resource.variables:
-        variables[variable.name] = variable
-    suite.resource.variables._items = list(variables.values())
+    def visit_Keyword(self, node):
+        pass
 
-    # Detect RPA
-    suite.rpa = _get_rpa_mode(ast)
 
-    return suite
+def build_suite(
+    code: str,
+    cell_history: Dict[str, str],
+    data_only: bool = False,
+    model: ResourceModel = None,
+    cell_id: str = None,
+):
+    if model is None:
+        model = ResourceModel(data_only=data_only)
+    model.sync(cell_history)
+    return model.build_suite(code, cell_id)
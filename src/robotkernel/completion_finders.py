@@ -1,16 +1,80 @@
 """Completion implementations."""
 
-from IPython.core.completerlib import get_root_modules
+from IPython.core.completerlib import module_list
 from robot.libraries import STDLIBS
+from robotkernel.index import SearchIndex
 from typing import List
+import os
+import sys
+import threading
 
 
-def complete_libraries(needle: str,) -> List[str]:
-    """Complete library names."""
-    matches = []
+def get_sys_path_signature():
+    """Return sys.path entries with their modification times."""
+    signature = []
+    for path in sys.path:
+        try:
+            signature.append((path, os.path.getmtime(path or ".")))
+        except OSError:
+            signature.append((path, None))
+    return tuple(signature)
+
+
+class RootModulesIndex:
+    """Index of importable root module names built in background thread.
+
+    The index is rebuilt when sys.path or modification times of its
+    entries change (e.g. when new packages get installed).
+    """
+
+    def __init__(self):
+        self.index = SearchIndex()
+        for name in STDLIBS:
+            self.index.add(None, name, name)
+        self.signature = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def build(self, signature):
+        index = SearchIndex()
+        for name in STDLIBS:
+            index.add(None, name, name)
+        for name in sys.builtin_module_names:
+            index.add(None, name, name)
+        for path, mtime in signature:
+            if mtime is None:
+                continue
+            for name in module_list(path):
+                if name != "__init__":
+                    index.add(None, name, name)
+        self.index = index
 
-    for lib in list(STDLIBS) + list(get_root_modules()):
-        if needle in lib.lower():
-            matches.append(lib)
+    def update(self):
+        """Start rebuilding the index when sys.path has changed."""
+        signature = get_sys_path_signature()
+        with self.lock:
+            if signature == self.signature:
+                return
+            if self.thread is not None and self.thread.is_alive():
+                return
+            self.signature = signature
+            self.thread = threading.Thread(
+                target=self.build, args=(signature,), daemon=True
+            )
+            self.thread.start()
 
-    return matches
+    def search(self, needle):
+        self.update()
+        index = self.index
+        if not needle:
+            return sorted(index.items)
+        return index.search(needle)
+
+
+ROOT_MODULES = RootModulesIndex()
+
+
+def complete_libraries(needle: str,) -> List[str]:
+    """Complete library names."""
+    matches = ROOT_MODULES.search(needle)
+    return sorted(matches, key=lambda name: (name not in STDLIBS, name))
@@ -19,6 +19,12 @@ except pkg_resources.DistributionNotFound:
 
 VARIABLE_REGEXP = re.compile(r"[$@&%]\{[\w\s]+\}")
 
+SESSION_MAGIC_REGEXP = re.compile(r"^%session\s+(on|off|setup)\s*$")
+
+INTROSPECTION_MSG_TYPES = ("complete_request", "inspect_request")
+
+COMPLETION_LIMIT = 100  # max. number of ranked completions
+
 CONTEXT_LIBRARIES = {
     "__root__": list(
         map(
@@ -8,6 +8,8 @@ from traitlets import Any
 from traitlets import Instance
 from traitlets import Type
 import re
+import threading
+import time
 
 
 class DisplayKernel(Kernel):
@@ -110,15 +112,25 @@ class DisplayKernel(Kernel):
 
 
 class ProgressUpdater(StringIO):
-    """Wrapper designed to capture robot.api.logger.console and display it."""
+    """Wrapper designed to capture robot.api.logger.console and display it.
+
+    Updates are coalesced to be sent at most once per interval (in seconds).
+    """
 
     colors = re.compile(r"\[[0-?]+[^m]+m")
 
-    def __init__(self, kernel: DisplayKernel, display_id, stdout):
+    def __init__(self, kernel: DisplayKernel, display_id, stdout, interval=0.1):
         self.kernel = kernel
         self.display_id = display_id
         self.stdout = stdout
+        self.interval = interval
         self.progress = {"dots": [], "test": "n/a", "keyword": "n/a", "message": None}
+        self.counters = {"tests": 0, "done": 0, "keywords": 0}
+        self.started = self.sent = time.monotonic()
+        self.lock = threading.Condition()
+        self.thread = None  # sends pending updates after the interval
+        self.pending = False
+        self.finished = False
         self.kernel.send_display_data(
             {
                 "text/html": f""
@@ -132,13 +144,26 @@ class ProgressUpdater(StringIO):
         )
         super(ProgressUpdater, self).__init__()
 
-    def _update(self):
+    @property
+    def keywords_per_second(self):
+        return self.counters["keywords"] / max(time.monotonic() - self.started, 1e-3)
+
+    def _send(self):
+        # Must be called while holding the lock
+        self.pending = False
+        if self.finished:
+            return
+        self.sent = time.monotonic()
         status_line = " | ".join(
             str(s)
             for s in [
+                self.counters["tests"]
+                and f"{self.counters['done']}/{self.counters['tests']}",
                 self.progress["test"],
                 self.progress["keyword"],
                 self.progress["message"],
+                self.counters["keywords"]
+                and f"{self.keywords_per_second:.0f} keywords/s",
             ]
             if s
         )
@@ -154,17 +179,58 @@ class ProgressUpdater(StringIO):
             display_id=self.display_id,
         )
 
+    def _flush(self):
+        # Send pending updates from a single thread at most once per interval
+        with self.lock:
+            while not self.finished:
+                delay = self.sent + self.interval - time.monotonic()
+                if not self.pending:
+                    self.lock.wait()
+                elif delay > 0:
+                    self.lock.wait(delay)
+                else:
+                    self._send()
+
+    def _schedule(self):
+        if self.pending:
+            return  # already waiting to be sent with the latest progress
+        with self.lock:
+            if self.finished:
+                return
+            elif self.sent + self.interval <= time.monotonic():
+                self._send()
+                return
+            self.pending = True
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._flush, daemon=True)
+                self.thread.start()
+            else:
+                self.lock.notify()
+
+    def finish(self):
+        """Send pending update and stop updating."""
+        with self.lock:
+            if self.pending:
+                self._send()
+            self.finished = True
+            self.lock.notify()
+
     def update(self, data):
-        if "test" in data:
+        if "tests" in data:
+            self.counters["tests"] = data["tests"]
+        elif "test" in data:
             self.progress["test"] = data["test"]
             self.progress["message"] = None
         elif "keyword" in data:
             self.progress["keyword"] = data["keyword"]
             self.progress["message"] = None
-        self._update()
+            self.counters["keywords"] += 1
+        elif "done" in data:
+            self.counters["done"] += 1
+        self._schedule()
 
     def write(self, s):
         self.progress["message"] = s.strip()
-        self._update()
+        self._schedule()
         self.stdout.write(s)
         return super(ProgressUpdater, self).write(s)
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from robot.errors import ExecutionFailed
 
 
 class BrokenOpenConnection(Exception):
@@ -7,3 +8,21 @@ class BrokenOpenConnection(Exception):
     def __init__(self, connection):
         """Init with connection be closed."""
         self.connection = connection
+
+
+class RobotInterrupt(ExecutionFailed):
+    """Robot execution stopped by kernel interrupt."""
+
+    def __init__(self):
+        """Init as robot would on Ctrl-C on the command line."""
+        super(RobotInterrupt, self).__init__(
+            "Execution terminated by signal", exit=True
+        )
+
+
+class RobotForcedInterrupt(SystemExit):
+    """Robot execution stopped forcefully by repeated kernel interrupt."""
+
+    def __init__(self):
+        """Init as robot would on repeated Ctrl-C on the command line."""
+        super(RobotForcedInterrupt, self).__init__("Execution forcefully stopped")
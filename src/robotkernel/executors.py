@@ -5,7 +5,9 @@ from io import StringIO
 from IPython.core.display import clear_output
 from IPython.core.display import display
 from PIL import Image
-from robot.reporting import ResultWriter
+from robot.api import ExecutionResult
+from robot.api import ResultVisitor
+from robot.result import Result
 from robot.running.model import TestSuite
 from robotkernel.builders import build_suite
 from robotkernel.display import DisplayKernel
@@ -14,8 +16,11 @@ from robotkernel.listeners import ReturnValueListener
 from robotkernel.listeners import RobotKeywordsIndexerListener
 from robotkernel.listeners import RobotVariablesListener
 from robotkernel.listeners import StatusEventListener
-from robotkernel.utils import data_uri
-from robotkernel.utils import javascript_uri
+from robotkernel.listeners import SuiteSetupStatusListener
+from robotkernel.monkeypatches import evict_imported_libraries
+from robotkernel.monkeypatches import keep_imported_libraries
+from robotkernel.results import get_results_links
+from robotkernel.results import ScreenshotStore
 from robotkernel.utils import to_mime_and_metadata
 from tempfile import TemporaryDirectory
 from traceback import format_exc
@@ -24,6 +29,7 @@ from typing import Tuple
 from urllib.parse import unquote
 import base64
 import binascii
+import hashlib
 import ipywidgets
 import os
 import re
@@ -38,6 +44,8 @@ def execute_python(kernel: DisplayKernel, code: str, module: str, silent: bool):
     """
     if module not in sys.modules:
         sys.modules[module] = types.ModuleType(module)
+    # Re-import keywords from re-executed module in session mode
+    evict_imported_libraries([module])
     try:
         exec(code, sys.modules[module].__dict__)
         return {"status": "ok", "execution_count": kernel.execution_count}
@@ -82,7 +90,7 @@ def execute_ipywidget(
 {name}
     {name}  {'  '.join([values[a[1]] for a in arguments])}
 """
-    suite = build_suite(code, history)
+    suite = build_suite(code, history, model=getattr(kernel, "robot_model", None))
     suite.rpa = True
     try:
         with TemporaryDirectory() as path:
@@ -190,7 +198,12 @@ def execute_robot(
 ):
     display_id = str(uuid.uuid4())
     try:
-        suite = build_suite(code, history)
+        suite = build_suite(
+            code,
+            history,
+            model=getattr(kernel, "robot_model", None),
+            cell_id=getattr(kernel, "robot_cell_id", None),
+        )
     except Exception as e:
         if not silent:
             kernel.send_error(
@@ -207,6 +220,19 @@ def execute_robot(
             "traceback": list(format_exc().splitlines()),
         }
 
+    # Run suite setup only once per its defining cell in session mode
+    setup = None
+    if getattr(kernel, "robot_session", False):
+        if suite.keywords.setup:
+            setup = kernel.robot_model.get_setting_source(
+                "SuiteSetup", code, getattr(kernel, "robot_cell_id", None)
+            )
+            if setup is not None and setup == kernel.robot_session_setup:
+                suite.keywords.setup = None
+        # Teardown would undo the setup, but is run as long as the setup is
+        if setup is not None:
+            suite.keywords.teardown = None
+
     for listener in listeners:
         # Update keywords catalog
         if isinstance(listener, RobotKeywordsIndexerListener):
@@ -218,6 +244,9 @@ def execute_robot(
                 listener.variables.pop(variable.name, None)
 
     if suite.tests:
+        setup_passed = []
+        if setup is not None and suite.keywords.setup:
+            listeners = listeners + [SuiteSetupStatusListener(setup_passed.append)]
         try:
             with TemporaryDirectory() as path:
                 reply = run_robot_suite(
@@ -226,6 +255,8 @@ def execute_robot(
         except PermissionError:
             # Purging of TemporaryDirectory may fail e.g. with geckodriver.log still open
             pass
+        if setup_passed == [True]:
+            kernel.robot_session_setup = setup
     else:
         last_code = getattr(kernel, "_last_code", "")
         if code == last_code:
@@ -251,7 +282,12 @@ def run_robot_suite(
 ):
     return_values = []
     if not (silent or widget):
-        progress = ProgressUpdater(kernel, display_id, sys.__stdout__)
+        progress = ProgressUpdater(
+            kernel,
+            display_id,
+            sys.__stdout__,
+            getattr(kernel, "robot_progress_interval", 0.1),
+        )
     else:
         progress = None
 
@@ -266,10 +302,12 @@ def run_robot_suite(
     if progress is not None:
         sys.__stdout__ = progress
     try:
-        results = suite.run(outputdir=path, stdout=stdout, listener=listeners)
+        with keep_imported_libraries(getattr(kernel, "robot_session", False)):
+            results = suite.run(outputdir=path, stdout=stdout, listener=listeners)
     finally:
         if progress is not None:
             sys.__stdout__ = progress.stdout
+            progress.finish()
 
     stats = results.statistics
 
@@ -292,36 +330,17 @@ def run_robot_suite(
         if bundle:
             kernel.send_execute_result(bundle, metadata)
 
-    # Process screenshots
-    process_screenshots(kernel, path, silent)
-
-    # Generate report
-    writer = ResultWriter(os.path.join(path, "output.xml"))
-    writer.write_results(
-        log=os.path.join(path, "log.html"),
-        report=os.path.join(path, "report.html"),
-        rpa=getattr(suite, "rpa", False),
-    )
-
-    with open(os.path.join(path, "log.html"), "rb") as fp:
-        log = fp.read()
-        log = log.replace(b'"reportURL":"report.html"', b'"reportURL":null')
-
-    with open(os.path.join(path, "report.html"), "rb") as fp:
-        report = fp.read()
-        report = report.replace(b'"logURL":"log.html"', b'"logURL":null')
-
-    # Clear status and display results
+    # Keep results for rendering log and report only on demand
     if not silent:
+        output = os.path.join(path, "output.xml")
+        result = ExecutionResult(output)
+        # Estimate the size of the model by its output.xml and inlined screenshots
+        length = os.path.getsize(output) + process_screenshots(
+            kernel, result, path, silent
+        )
+        result_id = kernel.robot_results.add(result, length)
         (widget and kernel.send_display_data or kernel.send_update_display_data)(
-            {
-                "text/html": ""
-                '<p><a href="about:" onClick="{}">Log</a> | <a href="about:" onClick="{}">Report</a></p>'.format(
-                    javascript_uri(log, "log.html"),
-                    javascript_uri(report, "report.html"),
-                )
-            },
-            display_id=display_id,
+            get_results_links(kernel.robot_results, result_id), display_id=display_id,
         )
 
     # Reply ok on pass
@@ -336,50 +355,91 @@ def run_robot_suite(
         return {"status": "ok", "execution_count": kernel.execution_count}
 
 
-def process_screenshots(kernel: DisplayKernel, path: str, silent: bool):
-    cwd = os.getcwd()
-    with open(os.path.join(path, "output.xml")) as fp:
-        xml = fp.read()
-    for src in re.findall('img src="([^"]+)', xml):
-        if os.path.exists(src):
-            filename = src
-        elif os.path.exists(os.path.join(path, src)):
-            filename = os.path.join(path, src)
-        elif os.path.exists(os.path.join(cwd, src)):
-            filename = os.path.join(cwd, src)
-        elif src.startswith("data:"):
-            filename = None
-            try:
-                spec, uri = src.split(",", 1)
-                spec, encoding = spec.split(";", 1)
-                spec, mimetype = spec.split(":", 1)
-                if not (encoding == "base64" and mimetype.startswith("image/")):
-                    continue
-                data = base64.b64decode(unquote(uri).encode("utf-8"))
-                im = Image.open(BytesIO(data))
-            except (binascii.Error, IndexError, ValueError):
-                continue
+SCREENSHOT_REGEXP = re.compile(
+    r'(?P<link><a href="(?P<href>[^"]+)">)?'
+    r'<img src="(?P<src>[^"]+)"(?P<width> width="800px")?'
+)
+
+
+class ScreenshotsVisitor(ResultVisitor):
+    """Rewrite screenshots in HTML messages of results model."""
+
+    def __init__(self, rewrite):
+        self.rewrite = rewrite
+
+    def visit_message(self, msg):
+        if msg.html and "img src=" in msg.message:
+            msg.message = self.rewrite(msg.message)
+
+
+def load_screenshot(src: str, path: str, cwd: str, store: ScreenshotStore):
+    """Return digest, mimetype, base64 encoded data and size of image or None."""
+    try:
+        if src.startswith("data:"):
+            spec, uri = src.split(",", 1)
+            spec, encoding = spec.split(";", 1)
+            spec, mimetype = spec.split(":", 1)
+            if not (encoding == "base64" and mimetype.startswith("image/")):
+                return None
+            encoded = unquote(uri)
+            data = base64.b64decode(encoded.encode("utf-8"))
         else:
-            continue
-        if filename:
-            im = Image.open(filename)
-            mimetype = Image.MIME[im.format]
-            # Fix issue where Pillow on Windows returns APNG for PNG
-            if mimetype == "image/apng":
-                mimetype = "image/png"
+            for filename in [src, os.path.join(path, src), os.path.join(cwd, src)]:
+                if os.path.isfile(filename):
+                    break
+            else:
+                return None
             with open(filename, "rb") as fp:
                 data = fp.read()
-        uri = data_uri(mimetype, data)
-        xml = xml.replace('a href="{}"'.format(src), "a")
-        xml = xml.replace(
-            'img src="{}" width="800px"'.format(src),
-            'img src="{}" style="max-width:800px;"'.format(uri),
-        )  # noqa: E501
-        xml = xml.replace('img src="{}"'.format(src), 'img src="{}"'.format(uri))
-        if not silent:
+            mimetype = encoded = None
+        digest = hashlib.sha1(data).hexdigest()
+        screenshot = store.get(digest)
+        if screenshot is None:
+            with Image.open(BytesIO(data)) as im:
+                if mimetype is None:
+                    mimetype = Image.MIME[im.format]
+                # Fix issue where Pillow on Windows returns APNG for PNG
+                if mimetype == "image/apng":
+                    mimetype = "image/png"
+                if encoded is None:
+                    encoded = base64.b64encode(data).decode("utf-8")
+                screenshot = store.add(digest, mimetype, encoded, im.size)
+        return screenshot
+    except (binascii.Error, IndexError, KeyError, OSError, ValueError):
+        return None
+
+
+def process_screenshots(kernel: DisplayKernel, result: Result, path: str, silent: bool):
+    """Inline and display screenshots of result and return their total length."""
+    cwd = os.getcwd()
+    store = getattr(kernel, "robot_screenshots", None) or ScreenshotStore()
+    screenshots = {}
+    displayed = set()
+    inlined = []
+
+    def replace(match):
+        src = match.group("src")
+        if src not in screenshots:
+            screenshots[src] = load_screenshot(src, path, cwd, store)
+        if screenshots[src] is None:
+            return match.group(0)
+        # Drop link only from the screenshot it wraps
+        link = match.group("link") or ""
+        if match.group("href") == src:
+            link = "<a>"
+        digest, mimetype, encoded, (width, height) = screenshots[src]
+        # Display identical screenshots only once
+        if not silent and digest not in displayed:
+            displayed.add(digest)
             kernel.send_display_data(
-                {mimetype: base64.b64encode(data).decode("utf-8")},
-                {mimetype: {"height": im.height, "width": im.width}},
+                {mimetype: encoded}, {mimetype: {"height": height, "width": width}},
             )
-    with open(os.path.join(path, "output.xml"), "w") as fp:
-        fp.write(xml)
+        inlined.append(len(encoded))
+        style = match.group("width") and ' style="max-width:800px;"' or ""
+        return f'{link}<img src="data:{mimetype};base64,{encoded}"{style}'
+
+    def rewrite(html):
+        return SCREENSHOT_REGEXP.sub(replace, html)
+
+    result.suite.visit(ScreenshotsVisitor(rewrite))
+    return sum(inlined)
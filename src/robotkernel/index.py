@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+from bisect import bisect_left
+from bisect import insort
+from collections import Counter
+from collections import defaultdict
+from robot.utils import normalize
+from robotkernel.constants import VARIABLE_REGEXP
+import logging
+import queue
+import re
+import threading
+
+
+TOKEN_SEPARATOR = re.compile(r"[\s\-]+")
+TOKEN_TRIMMER = re.compile(r"^\W+|\W+$")
+
+
+def tokenize(text):
+    """Return lower case tokens of text split and trimmed as lunr would."""
+    tokens = [TOKEN_TRIMMER.sub("", token) for token in TOKEN_SEPARATOR.split(text)]
+    return [token.lower() for token in tokens if token]
+
+
+def trigrams(token):
+    return {token[i : i + 3] for i in range(len(token) - 2)}
+
+
+class SearchIndex:
+    """Incremental substring search index of named items in groups.
+
+    Tokens of item names are kept in a sorted list for prefix search and
+    in trigram postings for substring search. Normalized names are kept
+    for exact lookups. Items are added and removed by group (e.g. by
+    library) without rebuilding the whole index.
+    """
+
+    def __init__(self):
+        self.items = {}  # ref: item
+        self.groups = defaultdict(set)  # group: refs
+        self.refs = {}  # ref: (group, tokens)
+        self.postings = defaultdict(set)  # token: refs
+        self.tokens = []  # sorted tokens
+        self.trigrams = defaultdict(set)  # trigram: tokens
+        self.names = defaultdict(set)  # normalized name: refs
+        self.cache = {}  # ref: memoized values
+        self.version = 0  # incremented on every change
+        self.lock = threading.RLock()
+
+    def __contains__(self, ref):
+        return ref in self.items
+
+    def __getitem__(self, ref):
+        return self.items[ref]
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, ref, default=None):
+        return self.items.get(ref, default)
+
+    def add(self, group, ref, item, *names):
+        """Add item by its ref and names (ref itself is always searchable)."""
+        tokens = set(tokenize(ref))
+        for name in names:
+            tokens.update(tokenize(name))
+        names = {normalize(name, ignore="_") for name in (ref,) + names}
+        with self.lock:
+            if ref in self.refs:
+                self.discard(ref)
+            self.version += 1
+            self.items[ref] = item
+            self.groups[group].add(ref)
+            self.refs[ref] = (group, tokens, names)
+            for name in names:
+                self.names[name].add(ref)
+            for token in tokens:
+                if token not in self.postings:
+                    insort(self.tokens, token)
+                    for trigram in trigrams(token):
+                        self.trigrams[trigram].add(token)
+                self.postings[token].add(ref)
+
+    def discard(self, ref):
+        with self.lock:
+            if ref not in self.refs:
+                return
+            group, tokens, names = self.refs.pop(ref)
+            self.version += 1
+            del self.items[ref]
+            self.cache.pop(ref, None)
+            for name in names:
+                self.names[name].discard(ref)
+                if not self.names[name]:
+                    del self.names[name]
+            self.groups[group].discard(ref)
+            if not self.groups[group]:
+                del self.groups[group]
+            for token in tokens:
+                self.postings[token].discard(ref)
+                if self.postings[token]:
+                    continue
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+                for trigram in trigrams(token):
+                    self.trigrams[trigram].discard(token)
+                    if not self.trigrams[trigram]:
+                        del self.trigrams[trigram]
+
+    def lookup(self, name):
+        """Return sorted refs of items with the given normalized name."""
+        with self.lock:
+            return sorted(self.names.get(normalize(name, ignore="_")) or [])
+
+    def get_cached(self, ref, factory):
+        """Return memoized factory(item) until the item is re-indexed.
+
+        Factory is called without holding the lock, because it may be slow
+        (e.g. load library documentation), and its value is memoized only
+        when the item has not been re-indexed in the meantime.
+        """
+        with self.lock:
+            item = self.items[ref]
+            if ref in self.cache:
+                return self.cache[ref]
+        value = factory(item)
+        with self.lock:
+            if self.items.get(ref) is item:
+                self.cache.setdefault(ref, value)
+        return value
+
+    def remove(self, group):
+        """Remove all items of the given group."""
+        with self.lock:
+            for ref in list(self.groups.get(group) or []):
+                self.discard(ref)
+
+    def _prefixed(self, prefix):
+        idx = bisect_left(self.tokens, prefix)
+        while idx < len(self.tokens) and self.tokens[idx].startswith(prefix):
+            yield self.tokens[idx]
+            idx += 1
+
+    def _containing(self, word):
+        postings = sorted(
+            [self.trigrams.get(trigram) or set() for trigram in trigrams(word)],
+            key=len,
+        )
+        candidates = postings[0].intersection(*postings[1:])
+        return [token for token in candidates if word in token]
+
+    def matches(self, ref, words):
+        """Return True when any of the words matches tokens of ref."""
+        for token in self.refs[ref][1]:
+            for word in words:
+                if len(word) < 3 and token.startswith(word):
+                    return True
+                elif len(word) >= 3 and word in token:
+                    return True
+        return False
+
+    def search(self, query):
+        """Return refs of items with tokens containing any query word.
+
+        Words shorter than three characters match only token prefixes.
+        Refs are returned in no particular order, because results are
+        ranked by scored_results.
+        """
+        refs = set()
+        with self.lock:
+            for word in tokenize(query):
+                if len(word) < 3:
+                    tokens = self._prefixed(word)
+                else:
+                    tokens = self._containing(word)
+                for token in tokens:
+                    refs.update(self.postings[token])
+        return list(refs)
+
+
+class VariablesIndex:
+    """Deduplicated variable names of notebook cells updated per cell."""
+
+    def __init__(self):
+        self.cells = {}  # cell id: (code, names)
+        self.counts = Counter()  # name: number of cells using it
+
+    def __iter__(self):
+        return iter(self.counts)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def update(self, cell_id, code):
+        if cell_id in self.cells and self.cells[cell_id][0] == code:
+            return
+        self.remove(cell_id)
+        names = frozenset(VARIABLE_REGEXP.findall(code))
+        self.cells[cell_id] = (code, names)
+        self.counts.update(names)
+
+    def remove(self, cell_id):
+        if cell_id in self.cells:
+            self.counts -= Counter(self.cells.pop(cell_id)[1])
+
+
+class IndexingQueue:
+    """Queue for running indexing tasks one by one in background thread."""
+
+    def __init__(self, log: logging.Logger = None):
+        self.queue = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.log = log or logging.getLogger(__name__)
+
+    def put(self, func, *args):
+        self.queue.put((func, args))
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            func, args = self.queue.get()
+            try:
+                func(*args)
+            except Exception:
+                self.log.exception("Indexing with %s failed", func.__name__)
+            finally:
+                self.queue.task_done()
+
+    def join(self):
+        """Block until all queued tasks have been completed."""
+        self.queue.join()
+
+
+def is_narrowing(words, previous):
+    """Return True when results for words are a subset of the previous."""
+    if not words or len(words) != len(previous) or words[:-1] != previous[:-1]:
+        return False
+    word, previous = words[-1], previous[-1]
+    return word.startswith(previous) and (len(word) < 3 or len(previous) >= 3)
+
+
+class CompletionCache:
+    """Search cache narrowing previous results when query is extended.
+
+    Number of hits and misses are counted for instrumentation.
+    """
+
+    def __init__(self, index: SearchIndex):
+        self.index = index
+        self.words = []
+        self.version = None
+        self.refs = []
+        self.hits = 0
+        self.misses = 0
+
+    def __getitem__(self, ref):
+        return self.index[ref]
+
+    @property
+    def hit_rate(self):
+        return self.hits / float(self.hits + self.misses or 1)
+
+    def search(self, query):
+        words = tokenize(query)
+        with self.index.lock:
+            if self.version == self.index.version and is_narrowing(words, self.words):
+                self.hits += 1
+                refs = [ref for ref in self.refs if self.index.matches(ref, words)]
+            else:
+                self.misses += 1
+                refs = self.index.search(query)
+            self.words, self.version, self.refs = words, self.index.version, refs
+        return refs
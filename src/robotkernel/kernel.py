@@ -1,23 +1,44 @@
 # -*- coding: utf-8 -*-
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from ipykernel.kernelbase import Kernel
 from IPython.utils.tokenutil import line_at_cursor
+from robot.running.signalhandler import STOP_SIGNAL_MONITOR
 from robotkernel import __version__
+from robotkernel.builders import ResourceModel
 from robotkernel.completion_finders import complete_libraries
+from robotkernel.completion_finders import ROOT_MODULES
+from robotkernel.constants import COMPLETION_LIMIT
 from robotkernel.constants import CONTEXT_LIBRARIES
 from robotkernel.constants import HAS_NBIMPORTER
+from robotkernel.constants import INTROSPECTION_MSG_TYPES
+from robotkernel.constants import SESSION_MAGIC_REGEXP
 from robotkernel.constants import VARIABLE_REGEXP
 from robotkernel.display import DisplayKernel
 from robotkernel.exceptions import BrokenOpenConnection
+from robotkernel.exceptions import RobotForcedInterrupt
+from robotkernel.exceptions import RobotInterrupt
 from robotkernel.executors import execute_python
 from robotkernel.executors import execute_robot
+from robotkernel.index import CompletionCache
+from robotkernel.index import IndexingQueue
+from robotkernel.index import SearchIndex
+from robotkernel.index import VariablesIndex
 from robotkernel.listeners import AppiumConnectionsListener
 from robotkernel.listeners import JupyterConnectionsListener
 from robotkernel.listeners import RobotKeywordsIndexerListener
+from robotkernel.listeners import RobotSessionListener
 from robotkernel.listeners import RobotVariablesListener
 from robotkernel.listeners import SeleniumConnectionsListener
 from robotkernel.listeners import WhiteLibraryListener
+from robotkernel.monkeypatches import cancel_robot_thread_interrupt
+from robotkernel.monkeypatches import evict_imported_libraries
 from robotkernel.monkeypatches import inject_libdoc_ipynb_support
 from robotkernel.monkeypatches import inject_robot_ipynb_support
+from robotkernel.monkeypatches import inject_robot_thread_support
+from robotkernel.monkeypatches import interrupt_robot_thread
+from robotkernel.results import RobotResults
+from robotkernel.results import ScreenshotStore
 from robotkernel.selectors import clear_selector_highlights
 from robotkernel.selectors import get_autoit_selector_completions
 from robotkernel.selectors import get_selector_completions
@@ -25,23 +46,34 @@ from robotkernel.selectors import get_white_selector_completions
 from robotkernel.selectors import is_autoit_selector
 from robotkernel.selectors import is_selector
 from robotkernel.selectors import is_white_selector
+from robotkernel.selectors import SelectorCache
 from robotkernel.utils import close_current_connection
 from robotkernel.utils import detect_robot_context
+from robotkernel.utils import get_keyword_completions
 from robotkernel.utils import get_keyword_doc
-from robotkernel.utils import get_lunr_completions
-from robotkernel.utils import lunr_builder
-from robotkernel.utils import lunr_query
+from robotkernel.utils import get_msg_type
 from robotkernel.utils import scored_results
 from robotkernel.utils import yield_current_connection
+from traitlets import Float
+import asyncio
+import inspect
+import ipykernel
 import re
 import robot
+import signal
 import sys
+import threading
 import uuid
 
 
 if HAS_NBIMPORTER:
     import nbimporter  # noqa
 
+# Serving introspection during execution overrides ipykernel 5 dispatching
+SCHEDULE_DISPATCH_SUPPORTED = "priority" in (
+    inspect.signature(getattr(Kernel, "schedule_dispatch", lambda: None)).parameters
+)
+
 
 # noinspection PyAbstractClass,DuplicatedCode
 class RobotKernel(DisplayKernel):
@@ -58,8 +90,18 @@ class RobotKernel(DisplayKernel):
     }
     banner = "Robot Framework kernel"
 
+    robot_progress_interval = Float(
+        0.1, help="Minimum interval in seconds between progress updates"
+    ).tag(config=True)
+
     def __init__(self, **kwargs):
         super(RobotKernel, self).__init__(**kwargs)
+        if not SCHEDULE_DISPATCH_SUPPORTED:
+            self.log.warning(
+                "Completion and inspection requests are served only between "
+                "executions with ipykernel %s (requires ipykernel 5)",
+                ipykernel.__version__,
+            )
         # Enable nbreader
         inject_robot_ipynb_support()
         inject_libdoc_ipynb_support()
@@ -67,21 +109,40 @@ class RobotKernel(DisplayKernel):
         # History to repeat after kernel restart
         self.robot_history = OrderedDict()
         self.robot_cell_id = None  # current cell id from init_metadata
+        self.robot_model = ResourceModel()  # live definitions by cell id
         self.robot_inspect_data = {}
-        self.robot_variables = []
+        self.robot_variables = VariablesIndex()  # variable names by cell id
         self.robot_suite_variables = {}
 
         # Sticky connection cache (e.g. for webdrivers)
         self.robot_connections = []
 
+        # Session mode keeps imported libraries alive between executions
+        # and runs suite setup only once per its defining cell
+        self.robot_session = False
+        self.robot_session_setup = None
+
+        # Robot is executed in its own thread to keep the kernel responsive
+        self.robot_executor = ThreadPoolExecutor(1, thread_name_prefix="Robot")
+        self.robot_execution = None  # future of the ongoing execution
+        self.robot_thread_id = None  # for interrupting the ongoing execution
+        self.robot_thread_lock = threading.Lock()
+
+        # Results of recent executions for rendering log and report on demand
+        self.robot_results = RobotResults()
+        self.robot_screenshots = ScreenshotStore()
+
+        # Selector completion candidates of the current documents of drivers
+        self.robot_selectors = SelectorCache()
+
         # Searchable index for keyword autocomplete documentation
-        builder = lunr_builder("dottedname", ["dottedname", "name"])
         self.robot_catalog = {
-            "builder": builder,
-            "index": None,
+            "index": SearchIndex(),
             "libraries": [],
-            "keywords": {},
+            "queue": IndexingQueue(self.log),  # for indexing imports in background
         }
+        self.robot_completions = CompletionCache(self.robot_catalog["index"])
+        ROOT_MODULES.update()  # index importable modules in background
         populator = RobotKeywordsIndexerListener(self.robot_catalog)
         populator.library_import("BuiltIn", {})
         for name, keywords in CONTEXT_LIBRARIES.items():
@@ -91,8 +152,14 @@ class RobotKernel(DisplayKernel):
     def do_shutdown(self, restart):
         super(RobotKernel, self).do_shutdown(restart)
         self.robot_history = OrderedDict()
-        self.robot_variables = []
+        self.robot_model = ResourceModel()
+        self.robot_variables = VariablesIndex()
         self.robot_suite_variables = {}
+        self.robot_session = False
+        self.robot_session_setup = None
+        self.robot_results.cleanup()
+        self.robot_screenshots.cleanup()
+        self.robot_selectors.clear()
         for driver in self.robot_connections:
             if hasattr(driver["instance"], "quit"):
                 driver["instance"].quit()
@@ -106,16 +173,20 @@ class RobotKernel(DisplayKernel):
         needle = re.split(r"\s{2,}|\t| \| ", line[:line_cursor])[-1].lstrip()
 
         if needle and needle[0] in "$@&%":  # is variable completion
+            variables = set(self.robot_variables)
+            variables.update(self.robot_suite_variables)
+            variables.update(VARIABLE_REGEXP.findall(code))
             matches = [
                 m["ref"]
                 for m in scored_results(
                     needle,
                     [
                         dict(ref=v)
-                        for v in (self.robot_variables + VARIABLE_REGEXP.findall(code))
+                        for v in sorted(variables)
+                        if needle.lower() in v.lower()
                     ],
+                    limit=COMPLETION_LIMIT,
                 )
-                if needle.lower() in m["ref"].lower()
             ]
             if len(line) > line_cursor and line[line_cursor] == "}":
                 cursor_pos += 1
@@ -125,7 +196,9 @@ class RobotKernel(DisplayKernel):
             for driver in yield_current_connection(
                 self.robot_connections, ["selenium", "jupyter", "appium"]
             ):
-                matches = get_selector_completions(needle.rstrip(), driver)
+                matches = get_selector_completions(
+                    needle.rstrip(), driver, self.robot_selectors
+                )
         elif is_autoit_selector(needle):
             matches = get_autoit_selector_completions(needle)
         elif is_white_selector(needle):
@@ -145,14 +218,15 @@ class RobotKernel(DisplayKernel):
                 self.robot_connections, ["selenium", "jupyter"]
             ):
                 try:
-                    clear_selector_highlights(driver)
+                    clear_selector_highlights(driver, self.robot_selectors)
                 except BrokenOpenConnection:
                     close_current_connection(self.robot_connections, driver)
-            matches = get_lunr_completions(
-                needle,
-                self.robot_catalog["index"],
-                self.robot_catalog["keywords"],
-                context,
+            matches = get_keyword_completions(needle, self.robot_completions, context)
+            self.log.debug(
+                "Completion cache hit rate %.2f (%d hits, %d misses)",
+                self.robot_completions.hit_rate,
+                self.robot_completions.hits,
+                self.robot_completions.misses,
             )
 
         return {
@@ -178,21 +252,88 @@ class RobotKernel(DisplayKernel):
             "found": bool(self.robot_inspect_data),
         }
 
-        results = []
-        if needle and lunr_query(needle):
-            query = lunr_query(needle)
-            results = self.robot_catalog["index"].search(query)
-            results += self.robot_catalog["index"].search(query.strip("*"))
-        for result in results:
-            keyword = self.robot_catalog["keywords"][result["ref"]]
-            if needle not in [keyword.name.lower(), result["ref"].lower()]:
+        index = self.robot_catalog["index"]
+        for ref in needle and index.lookup(needle) or []:
+            try:
+                doc = index.get_cached(ref, get_keyword_doc)
+            except KeyError:  # removed after lookup
                 continue
-            self.robot_inspect_data.update(get_keyword_doc(keyword))
+            self.robot_inspect_data.update(doc)
             reply_content["found"] = True
             break
 
         return reply_content
 
+    def schedule_dispatch(self, priority, dispatch, *args):
+        # Serve completion and inspection immediately while robot is running
+        # (overrides the ipykernel 5 method, see SCHEDULE_DISPATCH_SUPPORTED)
+        if (
+            self.robot_execution is not None
+            and dispatch == self.dispatch_shell
+            and get_msg_type(self.session, args[-1]) in INTROSPECTION_MSG_TYPES
+        ):
+            self.io_loop.add_callback(self.dispatch_introspection, *args)
+        else:
+            super(RobotKernel, self).schedule_dispatch(priority, dispatch, *args)
+
+    def dispatch_introspection(self, stream, msg):
+        # Unlike dispatch_shell, this does not publish busy and idle status,
+        # because idle status would make frontends show the kernel idle while
+        # robot is still running. Replies are sent by the handler as usual.
+        idents, msg = self.session.feed_identities(msg, copy=False)
+        msg = self.session.deserialize(msg, content=True, copy=False)
+        handler = self.shell_handlers[msg["header"]["msg_type"]]
+        return handler(stream, idents, msg)
+
+    # noinspection PyUnusedLocal
+    def interrupt_robot(self, signum, frame):
+        # Stop robot as on Ctrl-C on the command line, forcefully on repeat
+        with self.robot_thread_lock:
+            if self.robot_thread_id is not None:
+                interrupt_robot_thread(self.robot_thread_id)
+
+    def release_robot_thread(self):
+        # Stop forwarding interrupts and clear the ones not yet raised
+        with self.robot_thread_lock:
+            if self.robot_thread_id is not None:
+                cancel_robot_thread_interrupt(self.robot_thread_id)
+                self.robot_thread_id = None
+
+    def run_robot(self, code, listeners, silent, cell_id):
+        inject_robot_thread_support()
+        # noinspection PyProtectedMember
+        STOP_SIGNAL_MONITOR._signal_count = 0
+
+        # Execute test case
+        with self.robot_thread_lock:
+            self.robot_thread_id = threading.get_ident()
+        try:
+            try:
+                result = execute_robot(
+                    self, code, self.robot_history, listeners, silent
+                )
+            finally:
+                # Interrupt may still be raised here, but must not escape
+                self.release_robot_thread()
+        except (RobotInterrupt, RobotForcedInterrupt) as e:
+            self.release_robot_thread()
+            error = {
+                "ename": e.__class__.__name__,
+                "evalue": "Execution forcefully stopped",
+                "traceback": [],
+            }
+            if not silent:
+                self.send_error(error)
+            result = dict(error, status="error")
+
+        # Save history
+        if result["status"] == "ok":
+            cell_id = cell_id or str(uuid.uuid4())
+            self.robot_history[cell_id] = code
+            self.robot_variables.update(cell_id, code)
+
+        return result
+
     def init_metadata(self, parent):
         # Jupyter Lab sends deleted cells and the currently updated cell
         # id as message metadata, that allows to keep robot history in
@@ -201,6 +342,8 @@ class RobotKernel(DisplayKernel):
         for cell_id in deleted_cells:
             if cell_id in self.robot_history:
                 del self.robot_history[cell_id]
+            self.robot_model.remove(cell_id)
+            self.robot_variables.remove(cell_id)
         self.robot_cell_id = (parent.get("metadata") or {}).get("cellId") or None
         return super(RobotKernel, self).init_metadata(parent)
 
@@ -209,18 +352,22 @@ class RobotKernel(DisplayKernel):
     ):
         # Reload ipynb modules
         if HAS_NBIMPORTER:
+            reloaded = []
             for name, module in tuple(sys.modules.items()):
                 if "nbimporter.NotebookLoader" in repr(module):
                     del sys.modules[name]
+                    reloaded.append(name)
+            evict_imported_libraries(reloaded)
 
-        # Clear selector completion highlights
+        # Clear selector completion highlights and page source snapshots
         for driver in yield_current_connection(
             self.robot_connections, ["selenium", "jupyter"]
         ):
             try:
-                clear_selector_highlights(driver)
+                clear_selector_highlights(driver, self.robot_selectors)
             except BrokenOpenConnection:
                 close_current_connection(self.robot_connections, driver)
+        self.robot_selectors.clear_snapshots()
 
         # Support %%python module ModuleName cell magic
         match = re.match("^%%python module ([a-zA-Z_]+)", code)
@@ -232,33 +379,38 @@ class RobotKernel(DisplayKernel):
                 module,
                 silent,
             )
-        else:
-            # Update variables
-            self.robot_variables = []
-            for historical in self.robot_history.values():
-                self.robot_variables.extend(
-                    VARIABLE_REGEXP.findall(historical, re.U & re.M)
-                )
-            self.robot_variables.extend(VARIABLE_REGEXP.findall(code, re.U & re.M))
-
-            # Configure listeners
-            listeners = [
-                SeleniumConnectionsListener(self.robot_connections),
-                JupyterConnectionsListener(self.robot_connections),
-                AppiumConnectionsListener(self.robot_connections),
-                WhiteLibraryListener(self.robot_connections),
-                RobotKeywordsIndexerListener(self.robot_catalog),
-                RobotVariablesListener(self.robot_suite_variables),
-            ]
 
-            # Execute test case
-            result = execute_robot(self, code, self.robot_history, listeners, silent,)
+        # Support %session on|off|setup magic
+        match = SESSION_MAGIC_REGEXP.match(code.strip())
+        if match is not None:
+            if match.groups()[0] != "setup":
+                self.robot_session = match.groups()[0] == "on"
+            self.robot_session_setup = None
+            return {"status": "ok", "execution_count": self.execution_count}
+
+        # Configure listeners
+        listeners = [
+            SeleniumConnectionsListener(self.robot_connections),
+            JupyterConnectionsListener(self.robot_connections),
+            AppiumConnectionsListener(self.robot_connections),
+            WhiteLibraryListener(self.robot_connections),
+            RobotKeywordsIndexerListener(self.robot_catalog),
+            RobotVariablesListener(self.robot_suite_variables),
+        ]
+        if self.robot_session:
+            listeners.append(RobotSessionListener())
 
-            # Save history
-            if result["status"] == "ok":
-                self.robot_history[self.robot_cell_id or str(uuid.uuid4())] = code
+        # Execute test case in robot thread and forward interrupts to it
+        self.robot_execution = self.robot_executor.submit(
+            self.run_robot, code, listeners, silent, self.robot_cell_id
+        )
+        self.robot_execution.add_done_callback(self.robot_execution_done)
+        signal.signal(signal.SIGINT, self.interrupt_robot)
+        return asyncio.wrap_future(self.robot_execution)
 
-            return result
+    # noinspection PyUnusedLocal
+    def robot_execution_done(self, future):
+        self.robot_execution = None
 
 
 if __name__ == "__main__":
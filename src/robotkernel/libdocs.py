@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+from functools import lru_cache
+from jupyter_core.paths import jupyter_data_dir
+from robot.errors import DataError
+from robot.libdocpkg import LibraryDocumentation
+from robot.libdocpkg.model import KeywordDoc
+from robot.libdocpkg.model import LibraryDoc
+from robot.running.namespace import STDLIBS
+from tempfile import NamedTemporaryFile
+import hashlib
+import importlib.util
+import json
+import os
+import robot
+import sys
+
+
+try:
+    from importlib import metadata
+except ImportError:  # Python < 3.8
+    metadata = None
+
+
+def get_libdocs_cache_dir():
+    return os.path.join(jupyter_data_dir(), "robotkernel", "libdocs")
+
+
+def get_library_source(name):
+    """Return path to the source file or package directory of library."""
+    if os.path.splitext(name)[1] and os.path.exists(name):
+        return os.path.abspath(name)
+    if name in STDLIBS:
+        name = f"robot.libraries.{name}"
+    parts = name.split(".")
+    while parts:
+        try:
+            spec = importlib.util.find_spec(".".join(parts))
+        except (ImportError, AttributeError, ValueError):
+            spec = None
+        if spec is not None and spec.submodule_search_locations:
+            return list(spec.submodule_search_locations)[0]
+        elif spec is not None and spec.origin and os.path.isfile(spec.origin):
+            return spec.origin
+        parts.pop()
+    return None
+
+
+@lru_cache()
+def get_distribution_versions():
+    """Return versions of installed distributions by their top-level modules."""
+    versions = {}
+    if metadata is None:
+        return versions
+    for dist in metadata.distributions():
+        version = dist.version
+        names = (dist.read_text("top_level.txt") or "").split()
+        for name in names or [dist.metadata["Name"]]:
+            versions.setdefault(name, version)
+    return versions
+
+
+def get_library_version(name, source):
+    if source.startswith(os.path.dirname(robot.__file__)):
+        return robot.__version__
+    top_level = name.split(".")[0]
+    version = get_distribution_versions().get(top_level)
+    if version is None:
+        module = sys.modules.get(top_level)
+        version = getattr(module, "__version__", None)
+    return str(version or "")
+
+
+def get_source_mtime(source):
+    """Return mtime of library module file or package __init__."""
+    if os.path.isdir(source) and os.path.isfile(os.path.join(source, "__init__.py")):
+        return os.path.getmtime(os.path.join(source, "__init__.py"))
+    return os.path.getmtime(source)
+
+
+def dump_library_documentation(lib_doc):
+    return {
+        "name": lib_doc.name,
+        "doc_format": lib_doc.doc_format,
+        "type": lib_doc.type,
+        "version": lib_doc.version,
+        "keywords": [
+            {
+                "name": keyword.name,
+                "args": list(keyword.args),
+                "doc": str(getattr(keyword.doc, "value", keyword.doc)),
+                "tags": list(keyword.tags),
+            }
+            for keyword in lib_doc.keywords
+        ],
+    }
+
+
+def load_library_documentation(data):
+    lib_doc = LibraryDoc(
+        name=data["name"],
+        doc_format=data["doc_format"],
+        type=data["type"],
+        version=data["version"],
+    )
+    lib_doc.keywords = [KeywordDoc(**keyword) for keyword in data["keywords"]]
+    return lib_doc
+
+
+def get_library_documentation(name):
+    """Return LibraryDocumentation(name) cached by library version and mtime.
+
+    The cache persists between kernel sessions in Jupyter data directory.
+    """
+    source = get_library_source(name)
+    if source is None:
+        return LibraryDocumentation(name)
+    try:
+        key = [name, get_library_version(name, source), get_source_mtime(source)]
+    except OSError:
+        return LibraryDocumentation(name)
+    filename = os.path.join(
+        get_libdocs_cache_dir(),
+        hashlib.sha1(f"{name}:{source}".encode("utf-8")).hexdigest() + ".json",
+    )
+    try:
+        with open(filename, encoding="utf-8") as fp:
+            data = json.load(fp)
+        if data["key"] == key:
+            return load_library_documentation(data["libdoc"])
+    except (OSError, KeyError, TypeError, ValueError):
+        pass
+    lib_doc = LibraryDocumentation(name)
+    try:
+        data = json.dumps({"key": key, "libdoc": dump_library_documentation(lib_doc)})
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with NamedTemporaryFile(
+            "w", dir=os.path.dirname(filename), delete=False, encoding="utf-8"
+        ) as fp:
+            fp.write(data)
+        try:
+            os.replace(fp.name, filename)
+        except OSError:
+            os.unlink(fp.name)
+    except (OSError, TypeError, ValueError):
+        pass
+    return lib_doc
+
+
+KEYWORD_ARGS = {}  # shared argument tuples of keyword records
+
+
+class LibraryRecord:
+    """Library of compact keyword records loading documentation on demand.
+
+    Documentation of all keywords of the library is loaded once, when the
+    first keyword is inspected. Keywords of libraries without located
+    source (e.g. keywords of the executed suite) keep their documentation
+    in their records.
+    """
+
+    __slots__ = ("name", "source", "doc_format", "docs")
+
+    def __init__(self, name, source=None, doc_format="REST"):
+        self.name = name and sys.intern(name)
+        self.source = source  # name for get_library_documentation
+        self.doc_format = sys.intern(doc_format or "REST")
+        self.docs = None  # keyword name: documentation
+
+    def get_keyword_doc(self, name):
+        if self.source is None:
+            return ""
+        if self.docs is None:
+            try:
+                lib_doc = get_library_documentation(self.source)
+                self.docs = {keyword.name: keyword.doc for keyword in lib_doc.keywords}
+            except DataError:
+                self.docs = {}
+        return self.docs.get(name) or ""
+
+
+class KeywordRecord:
+    """Compact keyword catalog entry with lazily loaded documentation."""
+
+    __slots__ = ("name", "args", "library", "_doc")
+
+    def __init__(self, name, args, library: LibraryRecord, doc=None):
+        self.name = sys.intern(name)
+        args = tuple(sys.intern(str(arg)) for arg in args)
+        self.args = KEYWORD_ARGS.setdefault(args, args)
+        self.library = library
+        self._doc = doc
+
+    @property
+    def doc(self):
+        if self._doc is not None:
+            return self._doc
+        return self.library.get_keyword_doc(self.name)
+
+    @property
+    def doc_format(self):
+        return self.library.doc_format
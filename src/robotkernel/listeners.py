@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
 from robot.errors import DataError
-from robot.libdocpkg import LibraryDocumentation
 from robot.libraries.BuiltIn import BuiltIn
+from robot.running.libraryscopes import GlobalScope
+from robot.running.libraryscopes import TestSuiteScope
+from robot.running.namespace import IMPORTER
+from robotkernel.libdocs import get_library_documentation
+from robotkernel.libdocs import get_library_source
+from robotkernel.libdocs import KeywordRecord
+from robotkernel.libdocs import LibraryRecord
 import inspect
 
 
@@ -68,52 +74,69 @@ class RobotKeywordsIndexerListener:
     def __init__(self, catalog):
         self.catalog = catalog
 
+    def _enqueue(self, func, *args):
+        # Index in background, when catalog has indexing queue
+        if self.catalog.get("queue") is not None:
+            self.catalog["queue"].put(func, *args)
+        else:
+            func(*args)
+
     # noinspection PyUnusedLocal
     def library_import(self, alias, attributes):
         name = attributes.get("originalName") or alias
         if alias not in self.catalog["libraries"]:
             self.catalog["libraries"].append(alias)
-            try:
-                lib_doc = LibraryDocumentation(name)
-                self._library_import(lib_doc, alias)
-            except DataError:
-                pass
+            self._enqueue(self._library_documentation_import, name, alias)
 
-    def _library_import(self, lib_doc, alias):
+    def _library_documentation_import(self, name, alias):
+        try:
+            lib_doc = get_library_documentation(name)
+            self._library_import(lib_doc, alias, name)
+        except DataError:
+            pass
+
+    def _library_import(self, lib_doc, alias, source=None):
         if isinstance(lib_doc, list):
             keywords = lib_doc
-            doc_format = "REST"
+            library = LibraryRecord(alias)
         else:
             keywords = lib_doc.keywords
-            doc_format = lib_doc.doc_format
+            if source is not None and get_library_source(source) is None:
+                source = None  # documentation could not be loaded from cache
+            library = LibraryRecord(alias, source, lib_doc.doc_format)
         for keyword in keywords:
-            keyword.doc_format = doc_format
-            self.catalog["builder"].add(
-                {"name": keyword.name, "dottedname": f"{alias}.{keyword.name}"}
+            record = KeywordRecord(
+                keyword.name,
+                keyword.args,
+                library,
+                None if library.source else keyword.doc,
+            )
+            self.catalog["index"].add(
+                alias, f"{alias}.{record.name}", record, record.name
             )
-            self.catalog["keywords"][f"{alias}.{keyword.name}"] = keyword
-        if len(self.catalog["keywords"]):
-            self.catalog["index"] = self.catalog["builder"].build()
 
     # noinspection PyUnusedLocal
     def resource_import(self, name, attributes):
         if name not in self.catalog["libraries"]:
             self.catalog["libraries"].append(name)
-            try:
-                resource_doc = LibraryDocumentation(name)
-                self._resource_import(resource_doc.keywords)
-            except DataError:
-                pass
+            self._enqueue(self._resource_documentation_import, name)
+
+    def _resource_documentation_import(self, name):
+        try:
+            resource_doc = get_library_documentation(name)
+            self._resource_import(resource_doc.keywords, name, name)
+        except DataError:
+            pass
 
-    def _resource_import(self, keywords):
+    def _resource_import(self, keywords, name=None, source=None):
+        if source is not None and get_library_source(source) is None:
+            source = None  # documentation could not be loaded from cache
+        library = LibraryRecord(name, source)
         for keyword in keywords:
-            keyword.doc_format = "REST"
-            self.catalog["builder"].add(
-                {"name": keyword.name, "dottedname": keyword.name}
+            record = KeywordRecord(
+                keyword.name, keyword.args, library, None if source else keyword.doc
             )
-            self.catalog["keywords"][keyword.name] = keyword
-        if len(self.catalog["keywords"]):
-            self.catalog["index"] = self.catalog["builder"].build()
+            self.catalog["index"].add(name, record.name, record)
 
     def _import_from_suite_data(self, suite):
         self._resource_import(suite.resource.keywords)
@@ -131,6 +154,18 @@ class RobotKeywordsIndexerListener:
             pass
 
 
+class RobotSessionListener:
+    """Keep suite scoped library instances alive for the kernel session."""
+
+    ROBOT_LISTENER_API_VERSION = 2
+
+    # noinspection PyUnusedLocal,PyProtectedMember
+    def library_import(self, name, attributes):
+        for library in IMPORTER._library_cache.values():
+            if type(library.scope) is TestSuiteScope:
+                library.scope = GlobalScope(library)
+
+
 # noinspection PyUnusedLocal
 class StatusEventListener:
     ROBOT_LISTENER_API_VERSION = 2
@@ -138,14 +173,38 @@ class StatusEventListener:
     def __init__(self, callback):
         self.callback = callback
 
+    def start_suite(self, name, attributes):
+        if not attributes["id"].count("-"):  # root suite
+            self.callback({"tests": attributes["totaltests"]})
+
     def start_test(self, name, attributes):
         self.callback({"test": name})
 
+    def end_test(self, name, attributes):
+        self.callback({"done": name})
+
     def start_keyword(self, name, attributes):
         self.callback({"keyword": name})
 
 
 # noinspection PyUnusedLocal
+class SuiteSetupStatusListener:
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.started = False
+
+    # noinspection PyUnusedLocal
+    def start_test(self, name, attributes):
+        self.started = True
+
+    def end_keyword(self, name, attributes):
+        # Suite setup is the only setup before the first test
+        if attributes["type"] == "Setup" and not self.started:
+            self.callback(attributes["status"] == "PASS")
+
+
 class ReturnValueListener:
     ROBOT_LISTENER_API_VERSION = 2
 
@@ -206,16 +265,17 @@ def get_webdrivers(cache, type_):
 
 # noinspection PyProtectedMember
 def set_webdrivers(drivers, cache, type_):
-    idx = 1
     for driver in drivers:
         if driver["type"] != type_:
             continue
-        cache._connections.append(driver["instance"])
+        # Driver may be still open in a library instance kept by session mode
+        if driver["instance"] not in cache._connections:
+            cache._connections.append(driver["instance"])
+        idx = cache._connections.index(driver["instance"]) + 1
         for alias in driver["aliases"]:
             cache._aliases[alias] = idx
         if driver["current"]:
             cache.current = driver["instance"]
-        idx += 1
 
 
 class SeleniumConnectionsListener:
@@ -1,11 +1,24 @@
 # -*- coding: utf-8 -*-
+from contextlib import contextmanager
 from io import BytesIO
 from io import StringIO
 from robot.errors import DataError
+from robot.output import librarylogger
+from robot.running import timeouts
+from robot.running.namespace import IMPORTER
+from robot.running.signalhandler import STOP_SIGNAL_MONITOR
+from robot.running.timeouts.windows import Timeout as ThreadTimeout
+from robot.utils import error
 from robotkernel.constants import HAS_RF32_PARSER
+from robotkernel.constants import SESSION_MAGIC_REGEXP
+from robotkernel.exceptions import RobotForcedInterrupt
+from robotkernel.exceptions import RobotInterrupt
+import ctypes
 import os
 import re
 import sys
+import threading
+import time
 import types
 
 
@@ -23,6 +36,7 @@ else:
 def exec_code_into_module(code, module):
     if module not in sys.modules:
         sys.modules[module] = types.ModuleType(module)
+    evict_imported_libraries([module])
     exec(code, sys.modules[module].__dict__)
 
 
@@ -45,6 +59,10 @@ def NotebookReader():  # noqa: N802
                 if not cell.cell_type == "code":
                     continue
 
+                # Skip kernel session magics
+                if SESSION_MAGIC_REGEXP.match(cell.source.strip()):
+                    continue
+
                 # Execute %%python module magics
                 match = re.match("^%%python module ([a-zA-Z_]+)", cell.source)
                 if match is not None:
@@ -95,3 +113,113 @@ def inject_robot_ipynb_support():
     elif "ipynb" not in populators.READERS:
         populators.READERS["ipynb"] = NotebookReader
         TEST_EXTENSIONS.add("ipynb")
+
+
+# Modification times of resource files kept in session mode
+RESOURCE_MTIMES = {}
+
+
+def _evict_imported(cache, predicate):
+    # noinspection PyProtectedMember
+    for idx in reversed(range(len(cache._keys))):
+        # noinspection PyProtectedMember
+        if predicate(cache._keys[idx], cache._items[idx]):
+            del cache._keys[idx]
+            del cache._items[idx]
+
+
+def _get_mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except (OSError, TypeError):
+        return None
+
+
+def _get_library_module(library):
+    code = getattr(library, "_libcode", None)
+    if isinstance(code, types.ModuleType):
+        return code.__name__
+    return getattr(code, "__module__", None)
+
+
+def evict_imported_libraries(modules):
+    """Drop kept libraries imported by or implemented in the named modules."""
+    modules = set(modules)
+    # noinspection PyProtectedMember
+    _evict_imported(
+        IMPORTER._library_cache,
+        lambda key, library: key[0] in modules
+        or _get_library_module(library) in modules,
+    )
+
+
+def evict_changed_resources():
+    """Drop kept resource files modified since they were imported."""
+
+    def is_changed(path, resource):
+        if RESOURCE_MTIMES.get(path) == _get_mtime(path):
+            return False
+        RESOURCE_MTIMES.pop(path, None)
+        return True
+
+    # noinspection PyProtectedMember
+    _evict_imported(IMPORTER._resource_cache, is_changed)
+
+
+@contextmanager
+def keep_imported_libraries(enabled=True):
+    """Keep imported libraries and their instances between suite runs."""
+    if enabled:
+        evict_changed_resources()
+        IMPORTER.reset = lambda: None
+    else:
+        RESOURCE_MTIMES.clear()
+    try:
+        yield
+    finally:
+        if enabled:
+            del IMPORTER.reset
+            # noinspection PyProtectedMember
+            for path in IMPORTER._resource_cache._keys:
+                RESOURCE_MTIMES.setdefault(path, _get_mtime(path))
+
+
+def inject_robot_thread_support():
+    """Allow Robot Framework execution outside the main thread."""
+    name = threading.current_thread().name
+    if name not in librarylogger.LOGGING_THREADS:
+        librarylogger.LOGGING_THREADS += (name,)
+    # Signal based timeouts would only work in the main thread
+    timeouts.Timeout = ThreadTimeout
+    # Re-raise forced interrupt from keywords as SystemExit would be
+    if RobotForcedInterrupt not in error.RERAISED_EXCEPTIONS:
+        error.RERAISED_EXCEPTIONS += (RobotForcedInterrupt,)
+
+
+def interrupt_robot_thread(thread_id):
+    """Stop robot running in thread as on Ctrl-C on the command line.
+
+    The running keyword is interrupted by raising RobotInterrupt in the
+    thread. Repeated interrupt raises RobotForcedInterrupt, which, like
+    SystemExit on the command line, is not caught as a keyword failure.
+    """
+    # noinspection PyProtectedMember
+    STOP_SIGNAL_MONITOR._signal_count += 1
+    # noinspection PyProtectedMember
+    if STOP_SIGNAL_MONITOR._signal_count > 1:
+        exception = RobotForcedInterrupt
+    elif STOP_SIGNAL_MONITOR._running_keyword:
+        exception = RobotInterrupt
+    else:
+        return
+    # See robot.running.timeouts.windows for PyThreadState_SetAsyncExc
+    tid = ctypes.c_long(thread_id)
+    exception = ctypes.py_object(exception)
+    while ctypes.pythonapi.PyThreadState_SetAsyncExc(tid, exception) > 1:
+        ctypes.pythonapi.PyThreadState_SetAsyncExc(tid, None)
+        time.sleep(0)
+
+
+def cancel_robot_thread_interrupt(thread_id):
+    """Clear interrupt not yet raised in thread."""
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_long(thread_id), None)
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from IPython.core.display import clear_output
+from IPython.core.display import display
+from IPython.core.display import HTML
+from robot.reporting import ResultWriter
+from robot.result import Result
+from robotkernel.utils import javascript_uri
+from tempfile import TemporaryDirectory
+import ipywidgets
+import os
+import uuid
+
+
+class RobotResults:
+    """Bounded kernel scoped store for rendering log and report on demand.
+
+    The store is bounded both by the number of results and by their total
+    estimated size (e.g. size of output.xml and length of screenshots inlined
+    into results).
+    """
+
+    def __init__(self, size=20, length=256 * 1024 * 1024):
+        self.size = size
+        self.length = length
+        self.results = OrderedDict()  # result id: execution result model
+        self.lengths = {}  # result id: estimated length
+
+    def add(self, result: Result, length: int = 0):
+        result_id = str(uuid.uuid4())
+        self.results[result_id] = result
+        self.lengths[result_id] = length
+        while len(self.results) > 1 and (
+            len(self.results) > self.size or sum(self.lengths.values()) > self.length
+        ):
+            del self.lengths[self.results.popitem(last=False)[0]]
+        return result_id
+
+    def render(self, result_id: str, name: str):
+        result = self.results[result_id]
+        with TemporaryDirectory() as path:
+            ResultWriter(result).write_results(
+                log=name == "log.html" and os.path.join(path, name) or None,
+                report=name == "report.html" and os.path.join(path, name) or None,
+                rpa=result.rpa,
+            )
+            with open(os.path.join(path, name), "rb") as fp:
+                html = fp.read()
+        html = html.replace(b'"reportURL":"report.html"', b'"reportURL":null')
+        html = html.replace(b'"logURL":"log.html"', b'"logURL":null')
+        return html
+
+    def cleanup(self):
+        self.results = OrderedDict()
+        self.lengths = {}
+
+
+class ScreenshotStore:
+    """Bounded kernel scoped content addressed store of encoded screenshots."""
+
+    def __init__(self, size=64 * 1024 * 1024):
+        self.size = size  # total length of encoded screenshots
+        self.length = 0
+        self.screenshots = OrderedDict()  # digest: (digest, mimetype, data, size)
+
+    def get(self, digest: str):
+        screenshot = self.screenshots.get(digest)
+        if screenshot is not None:
+            self.screenshots.move_to_end(digest)
+        return screenshot
+
+    def add(self, digest: str, mimetype: str, data: str, size: tuple):
+        screenshot = self.screenshots[digest] = (digest, mimetype, data, size)
+        self.length += len(data)
+        while self.length > self.size and len(self.screenshots) > 1:
+            self.length -= len(self.screenshots.popitem(last=False)[1][2])
+        return screenshot
+
+    def cleanup(self):
+        self.length = 0
+        self.screenshots = OrderedDict()
+
+
+def get_results_links(results: RobotResults, result_id: str):
+    """Return mime bundle with links rendering log or report when clicked."""
+    out = ipywidgets.widgets.Output()
+
+    def render(button):
+        with out:
+            clear_output(wait=True)
+            try:
+                html = results.render(result_id, button.tooltip)
+            except KeyError:
+                print(f"{button.tooltip} is no longer available.")
+                return
+            display(
+                HTML(
+                    '<a href="about:" onClick="{}">Open {}</a>'.format(
+                        javascript_uri(html, button.tooltip), button.tooltip
+                    )
+                )
+            )
+
+    buttons = []
+    for description, name in [("Log", "log.html"), ("Report", "report.html")]:
+        buttons.append(ipywidgets.widgets.Button(description=description, tooltip=name))
+        buttons[-1].on_click(render)
+
+    ui = ipywidgets.widgets.VBox([ipywidgets.widgets.HBox(buttons), out])
+    return {
+        "application/vnd.jupyter.widget-view+json": {
+            "version_major": 2,
+            "version_minor": 0,
+            "model_id": ui.model_id,
+        },
+        "text/plain": "Log | Report",
+    }
@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
+from collections import defaultdict
 from robotkernel.exceptions import BrokenOpenConnection
+from xml.etree import ElementTree
+import functools
+import hashlib
 import os
 import pkg_resources
 import re
 import time
+import weakref
 
 
 try:
@@ -57,6 +62,12 @@ IS_LINK_SELECTOR_NEEDLE = re.compile(r"^link=|^link:|" r"^partial link:|^partial
 IS_XPATH_SELECTOR_NEEDLE = re.compile(r"^xpath=|^xpath:")
 FORM_TAG_NAMES = ["input", "textarea", "select", "button", "datalist"]
 IS_TEXT = re.compile(r"^[\w\s]+$", re.U)
+# Descendant paths of tag steps with attribute predicates, which ElementTree
+# evaluates like XPath, e.g. //android.widget.Button[@text="Sign in"]
+IS_SIMPLE_XPATH = re.compile(
+    r"^(//?(\*|[A-Za-z_][\w.\-]*)"
+    r"(\[@[A-Za-z_][\w.\-]*(=(\"[^\"]*\"|'[^']*'))?\])*)+$"
+)
 
 SELECTOR_HIGHLIGHT_STYLE_SCRIPT = """
 (function() {
@@ -106,6 +117,197 @@ SELECTOR_HIGHLIGHT_STYLE_SCRIPT = """
 })();
 """
 
+SELECTOR_MUTATION_COUNTER_SCRIPT = """
+(function() {
+  window.robotkernelMutations = 0;
+  new MutationObserver(function(mutations) {
+    for (var i = 0; i < mutations.length; i++) {
+      if (mutations[i].attributeName !== 'data-robotkernel') {
+        window.robotkernelMutations++;
+        return;
+      }
+    }
+  }).observe(document.documentElement, {
+    attributes: true, characterData: true, childList: true, subtree: true
+  });
+})();
+"""
+
+SELECTOR_VERSION_SCRIPT = """
+return window.robotkernelVersion;
+"""
+
+SELECTOR_HIGHLIGHT_SCRIPT = """
+var elements = arguments[0], completions = arguments[1];
+var highlighted = document.querySelectorAll('[data-robotkernel]');
+for (var i = 0; i < highlighted.length; i++) {
+  if (elements.indexOf(highlighted[i]) < 0) {
+    highlighted[i].removeAttribute('data-robotkernel');
+  }
+}
+for (var j = 0; j < elements.length; j++) {
+  elements[j].setAttribute('data-robotkernel', completions[j]);
+}
+return elements.length;
+"""
+
+SELECTOR_CANDIDATES_SCRIPT = """
+var version = arguments[0], cached = arguments[1];
+var queries = arguments[2], strategy = arguments[3], simmer = arguments[4];
+if (version && window.robotkernelVersion !== version) {
+  return {state: null, candidates: null};
+}
+var state = [window.location.href, window.robotkernelMutations];
+if (cached && cached[0] === state[0] && cached[1] === state[1]) {
+  return {state: state, candidates: null};
+}
+var forms = ['input', 'textarea', 'select', 'button', 'datalist'];
+var elements = [];
+for (var i = 0; i < queries.length && !elements.length; i++) {
+  if (strategy === 'xpath') {
+    var result = document.evaluate(
+      queries[i], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null
+    );
+    for (var j = 0; j < result.snapshotLength; j++) {
+      elements.push(result.snapshotItem(j));
+    }
+  } else if (strategy === 'link') {
+    elements = Array.prototype.filter.call(
+      document.querySelectorAll('a'), function(el) {
+        return (el.innerText || '').indexOf(queries[i]) > -1;
+      }
+    );
+  } else {
+    elements = Array.prototype.slice.call(document.querySelectorAll(queries[i]));
+  }
+}
+var candidates = elements.filter(function(el) {
+  return el.nodeType === 1;
+}).map(function(el) {
+  var rect = el.getBoundingClientRect();
+  var style = window.getComputedStyle(el);
+  var candidate = {
+    element: el,
+    displayed: (rect.width > 0 || rect.height > 0) &&
+      style.visibility !== 'hidden' && style.display !== 'none',
+    id: el.getAttribute('id') || '',
+    name: el.getAttribute('name') || '',
+    tag: el.tagName.toLowerCase(),
+    text: (el.innerText || '').trim(),
+    simmer: ''
+  };
+  if (window.Simmer && (simmer > 1 || (simmer > 0 && !candidate.id &&
+      !(candidate.name && forms.indexOf(candidate.tag) > -1)))) {
+    candidate.simmer = window.Simmer(el) || '';
+  }
+  return candidate;
+});
+return {state: state, candidates: candidates};
+"""
+
+
+class SelectorCache:
+    """Kernel scoped cache of selector completion candidates by driver.
+
+    Candidates are cached for the current document of the driver, which is
+    identified by its URL and its DOM mutation counter. Drivers with
+    highlighted completions are tracked to skip clearing highlights when
+    there is nothing to clear. Page source snapshots of Appium drivers are
+    kept until they are cleared when the next cell is executed.
+    """
+
+    def __init__(self):
+        self.documents = weakref.WeakKeyDictionary()  # driver: document cache
+        self.highlighted = weakref.WeakSet()  # drivers with highlights
+        self.snapshots = weakref.WeakKeyDictionary()  # driver: AppiumSnapshot
+
+    def get(self, driver, key):
+        """Return document state and cached candidates for key or Nones."""
+        state, candidates = self.documents.get(driver) or (None, {})
+        if key in candidates:
+            return state, candidates[key]
+        return None, None
+
+    def set(self, driver, state, key, candidates):
+        if driver not in self.documents or self.documents[driver][0] != state:
+            self.documents[driver] = (state, {})
+        self.documents[driver][1][key] = candidates
+
+    def clear_snapshots(self):
+        self.snapshots.clear()
+
+    def clear(self):
+        self.documents.clear()
+        self.highlighted.clear()
+        self.snapshots.clear()
+
+
+class AppiumSnapshot:
+    """Page source of Appium driver parsed and indexed for completions."""
+
+    def __init__(self, page_source: str):
+        self.root = ElementTree.fromstring(page_source.encode("utf-8"))
+        self.ids = defaultdict(list)  # resource-id: nodes
+        self.classes = defaultdict(list)  # class: nodes
+        self.texts = defaultdict(list)  # text: nodes
+        for node in self.root.iter():
+            if node.get("resource-id"):
+                self.ids[node.get("resource-id")].append(node)
+            if node.get("text"):
+                self.texts[node.get("text")].append(node)
+            self.classes[node.get("class") or node.tag].append(node)
+
+    def find_by_id(self, needle):
+        return [
+            node for id_, nodes in self.ids.items() if needle in id_ for node in nodes
+        ]
+
+    def find_by_text(self, needle):
+        return [
+            node
+            for text, nodes in self.texts.items()
+            if needle in text
+            for node in nodes
+        ]
+
+    def find_by_xpath(self, xpath):
+        """Return nodes matching xpath supported by ElementTree.
+
+        Raises SyntaxError for expressions ElementTree cannot evaluate like
+        XPath, e.g. unions, positions and function calls.
+        """
+        if not xpath.startswith("//") or not IS_SIMPLE_XPATH.match(xpath):
+            raise SyntaxError(f"unsupported expression: {xpath}")
+        return list(self.root.iterfind(f".{xpath}"))
+
+
+def compact_script(script):
+    return "\n".join(line.strip() for line in script.splitlines() if line.strip())
+
+
+@functools.lru_cache()
+def get_selector_scripts():
+    """Return version and bundle of helper scripts injected into documents."""
+    with pkg_resources.resource_stream(
+        "robotkernel", "resources/simmerjs/simmer.js"
+    ) as fp:
+        bundle = "\n".join(
+            [
+                fp.read().decode("utf-8").strip(),
+                compact_script(SELECTOR_HIGHLIGHT_STYLE_SCRIPT),
+                compact_script(SELECTOR_MUTATION_COUNTER_SCRIPT),
+            ]
+        )
+    version = hashlib.sha1(bundle.encode("utf-8")).hexdigest()[:12]
+    return version, f'{bundle}\nwindow.robotkernelVersion = "{version}";'
+
+
+def inject_selector_scripts(driver, probe=True):
+    """Inject helper scripts unless the current document has them already."""
+    version, bundle = get_selector_scripts()
+    if not probe or driver.execute_script(SELECTOR_VERSION_SCRIPT) != version:
+        driver.execute_script(bundle)
+
 
 def is_selenium_selector(needle):
     return bool(IS_SELENIUM_SELECTOR_NEEDLE.match(needle))
@@ -130,83 +332,56 @@ def is_selector(needle):
     return is_selenium_selector(needle) or is_appium_selector(needle)
 
 
-def get_element_highlight_script(results, old_elements):
-    script = ""
-    counter = 0
-    arguments = []
-    elements = [r[1] for r in results]
-    for element in old_elements:
-        if element not in elements:
-            script += f'arguments[{counter:d}].removeAttribute("data-robotkernel");'
-            arguments.append(element)
-            counter += 1
-    for completion, element in results:
-        if element not in old_elements:
-            script += (
-                f"arguments[{counter:d}].setAttribute("
-                f'"data-robotkernel", "{completion}");'
-            )
-            arguments.append(element)
-            counter += 1
-    return script, arguments
-
-
-def clear_selector_highlights(driver):
+def clear_selector_highlights(driver, cache: SelectorCache = None):
+    if cache is not None:
+        if driver not in cache.highlighted:
+            return
+        cache.highlighted.discard(driver)
     try:
-        script, arguments = get_element_highlight_script(
-            [], driver.find_elements_by_css_selector("[data-robotkernel]")
-        )
+        driver.execute_script(SELECTOR_HIGHLIGHT_SCRIPT, [], [])
     except InvalidSessionIdException:
         raise BrokenOpenConnection(driver)
     except WebDriverException:
         return
-    if script:
-        driver.execute_script(script, *arguments)
 
 
-def get_selector_completions(needle, driver):
+def get_selector_completions(needle, driver, cache: SelectorCache = None):
     if repr(driver).startswith("<appium.webdriver"):
-        return get_appium_selector_completions(needle, driver)
+        return get_appium_selector_completions(needle, driver, cache)
     else:
-        return get_selenium_selector_completions(needle, driver)
-
+        return get_selenium_selector_completions(needle, driver, cache)
 
-def get_selenium_selector_completions(needle, driver):
-    try:
-        # Inject supporting JS and CSS
-        styles = 'style[data-name="robotkernel"]'
-        if not driver.find_elements_by_css_selector(styles):
-            with pkg_resources.resource_stream(
-                "robotkernel", "resources/simmerjs/simmer.js"
-            ) as fp:
-                driver.execute_script(
-                    fp.read().decode("utf-8") + SELECTOR_HIGHLIGHT_STYLE_SCRIPT
-                )
-        can_highlight = True
-    except WebDriverException:
-        can_highlight = False
 
+def get_selenium_selector_completions(needle, driver, cache: SelectorCache = None):
     # Get results
     try:
-        results = _get_selenium_selector_completions(needle, driver)
+        results = _get_selenium_selector_completions(needle, driver, cache)
     except WebDriverException as e:
         return ["Exception (press esc to clear):", str(e)]
 
     # Highlight
-    if can_highlight:
-        script, arguments = get_element_highlight_script(
-            results, driver.find_elements_by_css_selector("[data-robotkernel]")
-        )
-        driver.execute_script(script, *arguments)
+    if results or cache is None or driver in cache.highlighted:
+        try:
+            highlighted = driver.execute_script(
+                SELECTOR_HIGHLIGHT_SCRIPT,
+                [r[1] for r in results],
+                [r[0] for r in results],
+            )
+        except WebDriverException:
+            highlighted = 0
+        if cache is not None and highlighted:
+            cache.highlighted.add(driver)
+        elif cache is not None:
+            cache.highlighted.discard(driver)
 
     # Return
     return [r[0] for r in results]
 
 
-def get_appium_selector_completions(needle, driver):
+def get_appium_selector_completions(needle, driver, cache: SelectorCache = None):
     # Get results
     try:
-        results = _get_appium_selector_completions(needle, driver)
+        results = _get_appium_selector_completions(needle, driver, cache)
     except WebDriverException as e:
         return ["Exception (press esc to clear):", str(e)]
 
@@ -262,28 +437,28 @@ def get_white_selector_completions(needle, driver=PickSnipTool):
         return []
 
 
-def _get_selenium_selector_completions(needle, driver):
+def _get_selenium_selector_completions(needle, driver, cache=None):
     if IS_ID_SELECTOR_NEEDLE.match(needle):
-        return get_selenium_id_selector_completions(needle, driver)
+        return get_selenium_id_selector_completions(needle, driver, cache)
     elif IS_NAME_SELECTOR_NEEDLE.match(needle):
-        return get_selenium_name_selector_completions(needle, driver)
+        return get_selenium_name_selector_completions(needle, driver, cache)
     elif IS_CSS_SELECTOR_NEEDLE.match(needle):
-        return get_selenium_css_selector_completions(needle, driver)
+        return get_selenium_css_selector_completions(needle, driver, cache)
     elif IS_TAG_SELECTOR_NEEDLE.match(needle):
-        return get_selenium_tag_selector_completions(needle, driver)
+        return get_selenium_tag_selector_completions(needle, driver, cache)
     elif IS_LINK_SELECTOR_NEEDLE.match(needle):
-        return get_selenium_link_selector_completions(needle, driver)
+        return get_selenium_link_selector_completions(needle, driver, cache)
     elif IS_XPATH_SELECTOR_NEEDLE.match(needle):
-        return get_selenium_xpath_selector_completions(needle, driver)
+        return get_selenium_xpath_selector_completions(needle, driver, cache)
     else:
         return []
 
 
-def _get_appium_selector_completions(needle, driver):
+def _get_appium_selector_completions(needle, driver, cache=None):
     if IS_ID_SELECTOR_NEEDLE.match(needle):
-        return get_appium_id_selector_completions(needle, driver)
+        return get_appium_id_selector_completions(needle, driver, cache)
     elif IS_XPATH_SELECTOR_NEEDLE.match(needle):
-        return get_appium_xpath_selector_completions(needle, driver)
+        return get_appium_xpath_selector_completions(needle, driver, cache)
     else:
         return []
 
@@ -297,72 +472,115 @@ def _get_autoit_selector_completions(needle, driver):
         return []
 
 
-def get_simmer_matches(elements, driver):
-    matches = []
-    if elements:
-        script = "return ["
-        script += ", ".join(
-            [f"window.Simmer(arguments[{idx:d}])" for idx in range(len(elements))]
+def get_selenium_candidates(driver, queries, strategy="css", simmer=0, cache=None):
+    """Return fields of all elements matching the first query with results.
+
+    Elements, their visibility, id, name, tag, text and optionally Simmer
+    selector are returned in a single round trip, which also checks that
+    helper scripts have been injected and whether the candidates cached for
+    the current document are still valid.
+    """
+    version = get_selector_scripts()[0]
+    key = (tuple(queries), strategy, simmer)
+    state, candidates = cache.get(driver, key) if cache is not None else (None, None)
+    arguments = [queries, strategy, simmer]
+    result = driver.execute_script(
+        SELECTOR_CANDIDATES_SCRIPT, version, state, *arguments
+    )
+    if result["state"] is None:
+        # Helper scripts are missing from the document or outdated
+        try:
+            inject_selector_scripts(driver, probe=False)
+        except WebDriverException:
+            version = None
+        result = driver.execute_script(
+            SELECTOR_CANDIDATES_SCRIPT, version, None, *arguments
         )
-        script += "];"
-        results = driver.execute_script(script, *elements)
-        for idx in range(len(results)):
-            if results[idx]:
-                matches.append((f"css:{results[idx]}", elements[idx]))
-    return matches
+    if result["candidates"] is None:
+        return candidates
+    if cache is not None and version is not None:
+        cache.set(driver, result["state"], key, result["candidates"])
+    return result["candidates"]
+
+
+def visible_candidates(candidates):
+    return [c for c in candidates if c["displayed"]] or candidates
+
+
+def get_simmer_matches(candidates):
+    return [(f"css:{c['simmer']}", c["element"]) for c in candidates if c["simmer"]]
 
 
 def visible_or_all(results):
     return list(filter(lambda e: e.is_displayed(), results)) or results
 
 
-def get_selenium_id_selector_completions(needle, driver):
-    needle = needle[3:]
-    matches = []
+def get_selenium_attribute_candidates(driver, attribute, needle, cache=None):
+    # Filter the snapshot of all elements with the attribute locally
+    candidates = get_selenium_candidates(driver, [f"[{attribute}]"], cache=cache)
     if needle:
-        results = driver.find_elements_by_css_selector(
-            f'[id="{needle}"]'
-        ) or driver.find_elements_by_css_selector(f'[id*="{needle}"]')
-    else:
-        results = driver.find_elements_by_xpath("//*[@id]")
-    for result in visible_or_all(results):
-        id_ = result.get_attribute("id")
-        matches.append((f"id:{id_}", result))
-    return matches
+        candidates = [c for c in candidates if c[attribute] == needle] or [
+            c for c in candidates if needle in c[attribute]
+        ]
+    return visible_candidates(candidates)
 
 
-def get_appium_id_selector_completions(needle, driver):
+def get_selenium_id_selector_completions(needle, driver, cache=None):
     needle = needle[3:]
-    matches = []
-    if needle:
-        results = driver.find_elements_by_xpath(
-            f"//*[" f'contains(@resource-id, "{needle}")' f"]"
-        )
-    else:
-        results = driver.find_elements_by_xpath("//*[@resource-id]")
-    for result in visible_or_all(results):
-        id_ = result.get_attribute("resource-id")
-        matches.append((f'xpath=//*[@resource-id="{id_}"]', result))
-    return matches
+    return [
+        (f"id:{c['id']}", c["element"])
+        for c in get_selenium_attribute_candidates(driver, "id", needle, cache)
+    ]
+
+
+def get_appium_snapshot(driver, cache=None):
+    """Return parsed page source snapshot of driver from cache or driver."""
+    snapshot = cache.snapshots.get(driver) if cache is not None else None
+    if snapshot is None:
+        try:
+            snapshot = AppiumSnapshot(driver.page_source)
+        except ElementTree.ParseError:
+            # e.g. some iOS page sources are not well-formed
+            return AppiumSnapshot("<hierarchy/>")
+        if cache is not None:
+            cache.snapshots[driver] = snapshot
+    return snapshot
+
+
+def visible_nodes(nodes):
+    return [
+        node
+        for node in nodes
+        if node.get("displayed", node.get("visible", "true")) == "true"
+    ] or nodes
+
+
+def get_appium_node_completion(node):
+    id_ = node.get("resource-id")
+    if id_:
+        return f'xpath=//*[@resource-id="{id_}"]'
+    class_ = node.get("class") or node.tag
+    text = node.get("text")
+    return f'xpath=//{class_}[@text="{text}"]'
+
+
+def get_appium_id_selector_completions(needle, driver, cache=None):
+    needle = needle[3:]
+    nodes = get_appium_snapshot(driver, cache).find_by_id(needle)
+    return [(get_appium_node_completion(node), node) for node in visible_nodes(nodes)]
 
 
-def get_selenium_name_selector_completions(needle, driver):
+def get_selenium_name_selector_completions(needle, driver, cache=None):
     needle = needle[5:]
-    matches = []
-    if needle:
-        results = driver.find_elements_by_css_selector(
-            f'[name="{needle}"]'
-        ) or driver.find_elements_by_css_selector(f'[name*="{needle}"]')
-    else:
-        results = driver.find_elements_by_xpath("//*[@name]")
-    for result in visible_or_all(results):
-        name = result.get_attribute("name")
-        matches.append((f"name:{name}", result))
-    return matches
+    return [
+        (f"name:{c['name']}", c["element"])
+        for c in get_selenium_attribute_candidates(driver, "name", needle, cache)
+    ]
 
 
 def get_selenium_needle_from_user(driver):
     try:
+        inject_selector_scripts(driver)
         return (
             driver.execute_async_script(
                 """\
@@ -393,104 +611,102 @@ if (node) { node.parentNode.removeChild(node); }
         return ""
 
 
-def get_selenium_css_selector_completions(needle, driver):
+def get_selenium_css_selector_completions(needle, driver, cache=None):
     needle = needle[4:]
     unresolved = []
-    results = []
+    candidates = []
     matches = []
     if not needle:
         needle = get_selenium_needle_from_user(driver)
     if needle:
-        results = driver.find_elements_by_css_selector(needle)
-    for result in visible_or_all(results):
-        id_ = result.get_attribute("id")
-        if " " in needle:  # always include simmer result for complex needles
-            unresolved.append(result)
-        if id_:
-            matches.append((f"id:{id_}", result))
+        # always include simmer result for complex needles
+        simmer = 2 if " " in needle else 1
+        candidates = visible_candidates(
+            get_selenium_candidates(driver, [needle], "css", simmer, cache)
+        )
+    for candidate in candidates:
+        if " " in needle:
+            unresolved.append(candidate)
+        if candidate["id"]:
+            matches.append((f"id:{candidate['id']}", candidate["element"]))
             continue
-        if result.tag_name in FORM_TAG_NAMES and result.get_attribute("name"):
-            name = result.get_attribute("name")
-            matches.append((f"name:{name}", result))
+        if candidate["tag"] in FORM_TAG_NAMES and candidate["name"]:
+            matches.append((f"name:{candidate['name']}", candidate["element"]))
             continue
-        if result.tag_name == "a" and result.text:
-            matches.append((f"link:{result.text}", result))
+        if candidate["tag"] == "a" and candidate["text"]:
+            matches.append((f"link:{candidate['text']}", candidate["element"]))
             continue
         if " " not in needle:
-            unresolved.append(result)
-    matches.extend(get_simmer_matches(unresolved, driver))
+            unresolved.append(candidate)
+    matches.extend(get_simmer_matches(unresolved))
     return matches
 
 
-def get_selenium_tag_selector_completions(needle, driver):
-    needle = needle[4:]
+def get_selenium_resolved_completions(candidates):
     unresolved = []
-    results = []
     matches = []
-    if needle:
-        results = driver.find_elements_by_css_selector(needle)
-    for result in visible_or_all(results):
-        id_ = result.get_attribute("id")
-        if id_:
-            matches.append((f"id:{id_}", result))
+    for candidate in candidates:
+        if candidate["id"]:
+            matches.append((f"id:{candidate['id']}", candidate["element"]))
+            continue
+        if candidate["tag"] in FORM_TAG_NAMES and candidate["name"]:
+            matches.append((f"name:{candidate['name']}", candidate["element"]))
             continue
-        if result.tag_name in FORM_TAG_NAMES:
-            name = result.get_attribute("name")
-            if name:
-                matches.append((f"name:{name}", result))
-                continue
-        unresolved.append(result)
-    matches.extend(get_simmer_matches(unresolved, driver))
+        unresolved.append(candidate)
+    matches.extend(get_simmer_matches(unresolved))
     return matches
 
 
-def get_selenium_link_selector_completions(needle, driver):
-    needle = needle[5:]
-    matches = []
+def get_selenium_tag_selector_completions(needle, driver, cache=None):
+    needle = needle[4:]
+    candidates = []
     if needle:
-        results = driver.find_elements_by_partial_link_text(needle)
-    else:
-        results = driver.find_elements_by_xpath("//a")
-    for result in visible_or_all(results):
-        if result.text:
-            matches.append((f"link:{result.text}", result))
-    return matches
+        candidates = visible_candidates(
+            get_selenium_candidates(driver, [needle], "css", 1, cache)
+        )
+    return get_selenium_resolved_completions(candidates)
+
+
+def get_selenium_link_selector_completions(needle, driver, cache=None):
+    needle = needle[5:]
+    # Filter the snapshot of all links locally
+    candidates = get_selenium_candidates(driver, [""], "link", cache=cache)
+    return [
+        (f"link:{c['text']}", c["element"])
+        for c in visible_candidates([c for c in candidates if needle in c["text"]])
+        if c["text"]
+    ]
 
 
-def get_selenium_xpath_selector_completions(needle, driver):
+def get_selenium_xpath_selector_completions(needle, driver, cache=None):
     needle = needle[6:]
-    results = []
-    matches = []
-    unresolved = []
+    candidates = []
     if needle:
-        results = driver.find_elements_by_xpath(needle)
-    for result in visible_or_all(results):
-        id_ = result.get_attribute("id")
-        if id_:
-            matches.append((f"id:{id_}", result))
-            continue
-        if result.tag_name in FORM_TAG_NAMES:
-            name = result.get_attribute("name")
-            if name:
-                matches.append((f"name:{name}", result))
-                continue
-        unresolved.append(result)
-    matches.extend(get_simmer_matches(unresolved, driver))
-    return matches
+        candidates = visible_candidates(
+            get_selenium_candidates(driver, [needle], "xpath", 1, cache)
+        )
+    return get_selenium_resolved_completions(candidates)
 
 
-def get_appium_xpath_selector_completions(needle, driver):
+def get_appium_xpath_selector_completions(needle, driver, cache=None):
     needle = needle[6:]
-    matches = []
+    snapshot = get_appium_snapshot(driver, cache)
     if IS_TEXT.match(needle):
-        results = driver.find_elements_by_xpath(
-            f"//*[" f'contains(@text, "{needle}")' f"]"
-        )
+        nodes = snapshot.find_by_text(needle)
     elif needle:
-        results = driver.find_elements_by_xpath(needle)
+        try:
+            nodes = snapshot.find_by_xpath(needle)
+        except (SyntaxError, KeyError):
+            # Fall back to remote query for expressions ElementTree cannot run
+            return get_appium_remote_xpath_selector_completions(needle, driver)
     else:
-        results = driver.find_elements_by_xpath("//*[@resource-id]")
-    for result in visible_or_all(results):
+        nodes = snapshot.find_by_id("")
+    return [(get_appium_node_completion(node), node) for node in visible_nodes(nodes)]
+
+
+def get_appium_remote_xpath_selector_completions(needle, driver):
+    matches = []
+    for result in visible_or_all(driver.find_elements_by_xpath(needle)):
         id_ = result.get_attribute("resource-id")
         if id_:
             matches.append((f'xpath=//*[@resource-id="{id_}"]', result))
@@ -498,8 +714,6 @@ def get_appium_xpath_selector_completions(needle, driver):
         class_ = result.get_attribute("class")
         text = result.get_attribute("text")
         matches.append((f'xpath=//{class_}[@text="{text}"]', result))
-        continue
-
     return matches
 
 
@@ -1,19 +1,15 @@
 # -*- coding: utf-8 -*-
-from copy import deepcopy
-from difflib import SequenceMatcher
 from IPython.core.display import Image
 from IPython.core.display import JSON
 from json import JSONDecodeError
-from lunr.builder import Builder
-from lunr.stemmer import stemmer
-from lunr.stop_word_filter import stop_word_filter
-from lunr.trimmer import trimmer
 from operator import itemgetter
 from pygments.formatters import HtmlFormatter
 from pygments.lexers import get_lexer_by_name
 from robot.libdocpkg.htmlwriter import DocToHtml
+from robotkernel.constants import COMPLETION_LIMIT
 from robotkernel.constants import HAS_RF32_PARSER
 import base64
+import heapq
 import json
 import os
 import pygments
@@ -62,21 +58,6 @@ def highlight(language, data):
     return pygments.highlight(data, lexer, formatter)
 
 
-def lunr_builder(ref, fields):
-    """A convenience function to configure and construct a lunr.Builder.
-
-    Returns:
-        Index: The populated Index ready to search against.
-    """
-    builder = Builder()
-    builder.pipeline.add(trimmer, stop_word_filter, stemmer)
-    builder.search_pipeline.add(stemmer)
-    builder.ref(ref)
-    for field in fields:
-        builder.field(field)
-    return builder
-
-
 def readable_keyword(s):
     """Return keyword with only the first letter in title case."""
     if s and not s.startswith("*") and not s.startswith("["):
@@ -120,11 +101,12 @@ def get_keyword_doc(keyword):
         title += " " + ", ".join(keyword.args)
         title_html += " " + ", ".join(keyword.args)
     body = ""
-    if keyword.doc:
-        if isinstance(keyword.doc, Documentation):
-            body = "\n\n" + keyword.doc.value.replace("\\n", "\n")
+    doc = keyword.doc  # may be loaded lazily
+    if doc:
+        if isinstance(doc, Documentation):
+            body = "\n\n" + doc.value.replace("\\n", "\n")
         else:
-            body = "\n\n" + keyword.doc
+            body = "\n\n" + doc
     return {
         "text/plain": title + "\n\n" + body,
         "text/html": f"<p>{title_html}</p>"
@@ -134,41 +116,92 @@ def get_keyword_doc(keyword):
     }
 
 
-def scored_results(needle, results):
-    results = deepcopy(results)
-    for result in results:
-        match = SequenceMatcher(
-            None, needle.lower(), result["ref"].lower(), autojunk=False
-        ).find_longest_match(0, len(needle), 0, len(result["ref"]))
-        result["score"] = (match.size, match.size / float(len(result["ref"])))
-    return list(reversed(sorted(results, key=itemgetter("score"))))
-
+def substring_patterns(needle):
+    """Return patterns matching substrings of needle by their length."""
+    return [None] + [
+        re.compile(
+            "|".join(
+                sorted(
+                    {
+                        re.escape(needle[i : i + size])
+                        for i in range(len(needle) - size + 1)
+                    }
+                )
+            )
+        )
+        for size in range(1, len(needle) + 1)
+    ]
+
+
+def longest_common_substring(needle, haystack, patterns=None):
+    """Return length of the longest common substring of the given strings."""
+    patterns = patterns or substring_patterns(needle)
+    low, high = 0, min(len(needle), len(haystack))
+    while low < high:  # common substring of length n implies also n - 1
+        size = (low + high + 1) // 2
+        if patterns[size].search(haystack):
+            low = size
+        else:
+            high = size - 1
+    return low
 
-def lunr_query(query):
-    query = re.sub(r"([:*])", r"\\\1", query, re.U)
-    query = re.sub(r"[\[\]]", r"", query, re.U)
-    return f"*{query.strip().lower()}*"
 
+def scored_results(needle, results, limit=None):
+    """Return results ordered by the longest common substring with needle and
+    then by the coverage of that match, with ties in the reverse order.
 
-def get_lunr_completions(needle, index, keywords, context):
+    When limit is given, only that many best results are scored in full.
+    """
+    needle = needle.lower()
+    patterns = substring_patterns(needle)
+    scored = []
+    for idx, result in enumerate(results):
+        ref = result["ref"].lower()
+        if limit and len(scored) >= limit:
+            worst = scored[0][0][0]
+            if min(len(needle), len(ref)) < worst:
+                continue  # cannot beat the current top results
+            elif worst and not patterns[worst].search(ref):
+                continue  # has no common substring as long as the top results
+        size = longest_common_substring(needle, ref, patterns)
+        item = ((size, size / float(len(ref) or 1)), idx, result)
+        if not limit:
+            scored.append(item)
+        elif len(scored) < limit:
+            heapq.heappush(scored, item)
+        elif item > scored[0]:  # indexes are unique and results never compared
+            heapq.heapreplace(scored, item)
+    return [
+        dict(result, score=score)
+        for score, idx, result in sorted(scored, key=itemgetter(0, 1), reverse=True)
+    ]
+
+
+def is_in_context(ref, context):
+    if ref.startswith("__"):
+        return ref.startswith(context)
+    return ref.startswith(context) or context in [
+        "__tasks__",
+        "__keywords__",
+        "__settings__",
+    ]
+
+
+def get_keyword_completions(needle, index, context, limit=COMPLETION_LIMIT):
+    """Return keyword completions from index or its CompletionCache.
+
+    Only the limit best matching keywords are ranked and returned.
+    """
     matches = []
     results = []
     if needle.rstrip():
-        query = lunr_query(needle)
-        results = index.search(query)
-        results += index.search(query.strip("*"))
-    for result in scored_results(needle, results):
+        results = [
+            {"ref": ref} for ref in index.search(needle) if is_in_context(ref, context)
+        ]
+    for result in scored_results(needle, results, limit=limit):
         ref = result["ref"]
-        if ref.startswith("__") and not ref.startswith(context):
-            continue
-        if not ref.startswith(context) and context not in [
-            "__tasks__",
-            "__keywords__",
-            "__settings__",
-        ]:
-            continue
         if not needle.count("."):
-            keyword = keywords[ref].name
+            keyword = index[ref].name
             if keyword not in matches:
                 matches.append(readable_keyword(keyword))
         else:
@@ -252,3 +285,10 @@ def close_current_connection(connections, connection_to_close):
         if hasattr(match["instance"], "quit"):
             match["instance"].quit()
         connections.remove(match)
+
+
+def get_msg_type(session, msg_list):
+    """Peek message type of a raw shell message without consuming it."""
+    idents, msg_list = session.feed_identities(msg_list, copy=False)
+    header = getattr(msg_list[1], "bytes", msg_list[1])
+    return session.unpack(header).get("msg_type")
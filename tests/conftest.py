@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+
+class RecordingKernel:
+    """Kernel stub recording sent display data as (data, metadata) pairs."""
+
+    def __init__(self):
+        self.display_data = []
+
+    def send_display_data(self, data=None, metadata=None, display_id=None):
+        self.display_data.append((data, metadata))
+
+    def send_update_display_data(self, data=None, metadata=None, display_id=None):
+        self.display_data.append((data, metadata))
+
+
+@pytest.fixture
+def recording_kernel():
+    return RecordingKernel()
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
+from collections import OrderedDict
 from robotkernel.builders import build_suite
+from robotkernel.builders import ResourceModel
+from robotkernel.constants import HAS_RF32_PARSER
+import pytest
 
 
 TEST_SUITE = """\
@@ -27,3 +31,55 @@ def test_string():
     suite = build_suite(TEST_SUITE, {})
     assert len(suite.resource.keywords) == 1
     assert len(suite.tests) == 1
+
+
+@pytest.mark.skipif(not HAS_RF32_PARSER, reason="requires RF32 parser")
+def test_cached_history_models():
+    model = ResourceModel()
+    history = {"cell-1": TEST_SUITE}
+    build_suite("", history, model=model)
+    assert "cell-1" in model.models
+    cached = model.models["cell-1"]
+    suite = build_suite("", history, model=model)
+    assert model.models["cell-1"] is cached
+    assert len(suite.resource.keywords) == 1
+    assert len(suite.tests) == 0
+
+    history["cell-1"] = TEST_SUITE.replace("Head", "Tail")
+    suite = build_suite("", history, model=model)
+    assert model.models["cell-1"] is not cached
+    assert [k.name for k in suite.resource.keywords] == ["Tail"]
+
+
+@pytest.mark.skipif(not HAS_RF32_PARSER, reason="requires RF32 parser")
+def test_resource_model_patches_definitions():
+    model = ResourceModel()
+    history = OrderedDict()
+    history["cell-1"] = TEST_SUITE
+    history["cell-2"] = TEST_SUITE.replace("Collections", "String")
+    suite = build_suite(TEST_SUITE, history, model=model)
+    assert [i.name for i in suite.resource.imports] == ["Collections", "String"]
+    assert [k.name for k in suite.resource.keywords] == ["Head"]
+    assert len(suite.tests) == 1
+
+    del history["cell-2"]
+    model.remove("cell-2")
+    suite = build_suite("", history, model=model)
+    assert [i.name for i in suite.resource.imports] == ["Collections"]
+    assert [k.name for k in suite.resource.keywords] == ["Head"]
+
+    del history["cell-1"]
+    suite = build_suite("", history, model=model)
+    assert len(suite.resource.imports) == 0
+    assert len(suite.resource.keywords) == 0
+
+
+@pytest.mark.skipif(not HAS_RF32_PARSER, reason="requires RF32 parser")
+def test_resource_model_setting_source():
+    model = ResourceModel()
+    setup = "*** Settings ***\nSuite Setup  Log  Hello\n"
+    history = OrderedDict([("cell-1", setup), ("cell-2", TEST_SUITE)])
+    model.sync(history)
+    assert model.get_setting_source("SuiteSetup", TEST_SUITE) == ("cell-1", setup)
+    assert model.get_setting_source("SuiteSetup", setup, "cell-3") == ("cell-3", setup,)
+    assert model.get_setting_source("SuiteTeardown", TEST_SUITE) is None
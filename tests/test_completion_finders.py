@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from robotkernel.completion_finders import complete_libraries
+from robotkernel.completion_finders import RootModulesIndex
+import os
+import sys
+
+
+def test_complete_libraries():
+    assert complete_libraries("collec")[0] == "Collections"
+    assert "BuiltIn" in complete_libraries("")
+
+
+def test_root_modules_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "path", [str(tmp_path)])
+    (tmp_path / "FirstLibrary.py").write_text("")
+    os.utime(tmp_path, (1000, 1000))
+    index = RootModulesIndex()
+    index.update()
+    index.thread.join()
+    assert index.search("library") == ["FirstLibrary"]
+    assert index.search("fi") == ["FirstLibrary"]
+    assert "Collections" in index.search("")
+
+    # Index is not rebuilt when sys.path has not changed
+    thread = index.thread
+    index.update()
+    assert index.thread is thread
+
+    # Index is rebuilt when sys.path entry has been modified
+    (tmp_path / "SecondLibrary.py").write_text("")
+    os.utime(tmp_path, (2000, 2000))
+    index.update()
+    index.thread.join()
+    assert sorted(index.search("library")) == ["FirstLibrary", "SecondLibrary"]
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+from io import StringIO
+from robotkernel.display import ProgressUpdater
+import time
+
+
+def test_progress_updates_are_coalesced(recording_kernel):
+    kernel = recording_kernel
+    progress = ProgressUpdater(kernel, "display_id", StringIO(), interval=60)
+    progress.update({"tests": 2})
+    for idx in range(2):
+        progress.update({"test": f"Test {idx}"})
+        for idy in range(1000):
+            progress.update({"keyword": f"Keyword {idy}"})
+        progress.update({"done": f"Test {idx}"})
+    progress.write("Hello World\n")
+    assert len(kernel.display_data) == 1
+    progress.finish()
+    assert len(kernel.display_data) == 2
+    assert progress.counters == {"tests": 2, "done": 2, "keywords": 2000}
+    status = kernel.display_data[-1][0]["text/html"]
+    assert "2/2 | Test 1 | Keyword 999 | Hello World | " in status
+    progress.update({"keyword": "Too late"})
+    progress.finish()
+    assert len(kernel.display_data) == 2
+    assert progress.stdout.getvalue() == "Hello World\n"
+
+
+def test_progress_updates_without_interval(recording_kernel):
+    kernel = recording_kernel
+    progress = ProgressUpdater(kernel, "display_id", StringIO(), interval=0)
+    progress.update({"test": "Test"})
+    progress.update({"keyword": "Keyword"})
+    progress.finish()
+    assert len(kernel.display_data) == 3
+
+
+def test_progress_updates_are_sent_from_single_thread(recording_kernel):
+    kernel = recording_kernel
+    progress = ProgressUpdater(kernel, "display_id", StringIO(), interval=0.02)
+    threads = set()
+    started = time.monotonic()
+    while time.monotonic() - started < 0.3:
+        progress.update({"keyword": "Keyword"})
+        threads.add(progress.thread)
+        time.sleep(0.001)
+    progress.finish()
+    progress.thread.join(timeout=1)
+    assert len(threads - {None}) == 1
+    assert not progress.thread.is_alive()
+    assert 5 < len(kernel.display_data) < 30
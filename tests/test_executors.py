@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+from collections import OrderedDict
+from io import BytesIO
+from io import StringIO
+from PIL import Image
+from robot.api import ExecutionResult
+from robotkernel.builders import build_suite
+from robotkernel.builders import ResourceModel
+from robotkernel.constants import HAS_RF32_PARSER
+from robotkernel.executors import execute_python
+from robotkernel.executors import execute_robot
+from robotkernel.executors import process_screenshots
+from robotkernel.utils import data_uri
+from tempfile import TemporaryDirectory
+import os
+import pytest
+import sys
+import types
+
+
+TEST_SUITE = """\
+*** Tasks ***
+
+Log screenshots
+    Log  <a href="screenshot.png"><img src="screenshot.png" width="800px"></a>  html=true
+    Log  <img src="missing.png">  html=true
+    Log  screenshot.png
+    Log  <img src="{data_uri}">  html=true
+    Log  <img src="copy.png">  html=true
+    Log  <a href="screenshot.png">Link</a> <a href="copy.png"><img src="copy.png"></a>  html=true
+"""
+
+
+def test_process_screenshots(recording_kernel):
+    kernel = recording_kernel
+    data = BytesIO()
+    Image.new("RGB", (2, 2)).save(data, format="png")
+    uri = data_uri("image/png", data.getvalue())
+    suite = build_suite(TEST_SUITE.replace("{data_uri}", uri), {})
+    with TemporaryDirectory() as path:
+        Image.new("RGB", (4, 2)).save(os.path.join(path, "screenshot.png"))
+        Image.new("RGB", (4, 2)).save(os.path.join(path, "copy.png"))
+        suite.run(outputdir=path, stdout=StringIO())
+        result = ExecutionResult(os.path.join(path, "output.xml"))
+        length = process_screenshots(kernel, result, path, False)
+    assert length > 0
+    messages = [kw.messages[0].message for kw in result.suite.tests[0].keywords]
+    assert messages[0].startswith('<a><img src="data:image/png;base64,')
+    assert messages[0].endswith('" style="max-width:800px;"></a>')
+    assert messages[1] == '<img src="missing.png">'
+    assert messages[2] == "screenshot.png"
+    assert messages[3] == f'<img src="{uri}">'
+    assert messages[4][:-1] in messages[0]
+    assert messages[5].startswith(
+        '<a href="screenshot.png">Link</a> <a><img src="data:'
+    )
+    assert len(kernel.display_data) == 2
+    assert kernel.display_data[0][1] == {"image/png": {"height": 2, "width": 4}}
+    assert kernel.display_data[1][1] == {"image/png": {"height": 2, "width": 2}}
+
+
+SESSION_SUITE = """\
+*** Settings ***
+
+Library  {library}
+Suite Setup  Count setup
+
+*** Tasks ***
+
+Fail after setup
+    Fail  Expected failure
+"""
+
+
+@pytest.mark.skipif(not HAS_RF32_PARSER, reason="Requires RF 3.2 parser")
+def test_session_setup_is_recorded_when_tests_fail(tmp_path):
+    library = tmp_path / "SetupCounter.py"
+    library.write_text("SETUPS = []\n\ndef count_setup():\n    SETUPS.append(1)\n")
+    kernel = types.SimpleNamespace(
+        robot_session=True,
+        robot_session_setup=None,
+        robot_model=ResourceModel(),
+        robot_cell_id="setup",
+        execution_count=1,
+    )
+    code = SESSION_SUITE.format(library=library)
+    for _ in range(3):
+        reply = execute_robot(kernel, code, OrderedDict(), [], silent=True)
+        assert reply["status"] == "error"
+    assert kernel.robot_session_setup == ("setup", code)
+    assert sys.modules["SetupCounter"].SETUPS == [1]
+
+
+KEPT_SUITE = """\
+*** Settings ***
+Library  KeptModule
+Resource  {resource}
+
+*** Tasks ***
+
+Use kept keywords
+    ${{value}} =  Value
+    Should Be Equal  ${{value}}  {expected}
+    Resource Keyword  {expected}
+"""
+
+KEPT_RESOURCE = """\
+*** Keywords ***
+
+Resource Keyword
+    [Arguments]  ${{value}}
+    Should Be Equal  ${{value}}  {expected}
+"""
+
+
+@pytest.mark.skipif(not HAS_RF32_PARSER, reason="Requires RF 3.2 parser")
+def test_session_reimports_changed_modules_and_resources(tmp_path):
+    resource = tmp_path / "kept.resource"
+    kernel = types.SimpleNamespace(
+        robot_session=True,
+        robot_session_setup=None,
+        robot_model=ResourceModel(),
+        robot_cell_id="kept",
+        execution_count=1,
+    )
+    for idx, expected in enumerate(["one", "two"]):
+        execute_python(
+            kernel, f"def value():\n    return '{expected}'", "KeptModule", True
+        )
+        resource.write_text(KEPT_RESOURCE.format(expected=expected))
+        os.utime(resource, (idx, idx))
+        code = KEPT_SUITE.format(resource=resource, expected=expected)
+        reply = execute_robot(kernel, code, OrderedDict(), [], silent=True)
+        assert reply["status"] == "ok"
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+from robot.libdocpkg.model import KeywordDoc
+from robotkernel.index import CompletionCache
+from robotkernel.index import IndexingQueue
+from robotkernel.index import SearchIndex
+from robotkernel.index import tokenize
+from robotkernel.index import VariablesIndex
+from robotkernel.listeners import RobotKeywordsIndexerListener
+from robotkernel.utils import get_keyword_completions
+import logging
+import threading
+
+
+def test_tokenize():
+    assert tokenize("*** Settings ***") == ["settings"]
+    assert tokenize("[Arguments]") == ["arguments"]
+    assert tokenize("Library.Open Browser-Window") == [
+        "library.open",
+        "browser",
+        "window",
+    ]
+
+
+def test_search_index():
+    index = SearchIndex()
+    index.add("A", "A.Open Browser", 1, "Open Browser")
+    index.add("A", "A.Close Browser", 2, "Close Browser")
+    index.add("B", "B.Open Application", 3, "Open Application")
+    assert sorted(index.search("open")) == ["A.Open Browser", "B.Open Application"]
+    assert sorted(index.search("owse")) == ["A.Close Browser", "A.Open Browser"]
+    assert index.search("cl") == ["A.Close Browser"]
+    assert index.search("se") == []
+    assert index.search("b.open") == ["B.Open Application"]
+    assert sorted(index.search("close application")) == [
+        "A.Close Browser",
+        "B.Open Application",
+    ]
+    index.remove("A")
+    assert len(index) == 1
+    assert index.search("browser") == []
+    assert index.tokens == ["application", "b.open", "open"]
+    assert "bro" not in index.trigrams
+    index.add("B", "B.Open Application", 4, "Open Application")
+    assert index["B.Open Application"] == 4
+    index.remove("B")
+    assert not index.tokens and not index.postings and not index.trigrams
+
+
+def test_keyword_completions():
+    catalog = {"index": SearchIndex(), "libraries": []}
+    listener = RobotKeywordsIndexerListener(catalog)
+    # noinspection PyProtectedMember
+    listener._library_import(
+        [KeywordDoc(name="Open Browser"), KeywordDoc(name="Open Application")],
+        "Library",
+    )
+    assert get_keyword_completions("open b", catalog["index"], "__tasks__") == [
+        "Open browser",
+        "Open application",
+    ]
+    assert get_keyword_completions("library.op", catalog["index"], "__tasks__") == [
+        "Library.Open browser",
+        "Library.Open application",
+    ]
+    assert get_keyword_completions("", catalog["index"], "__tasks__") == []
+    assert get_keyword_completions("open b", catalog["index"], "__tasks__", 1) == [
+        "Open browser"
+    ]
+
+
+def test_variables_index():
+    index = VariablesIndex()
+    index.update("a", "${foo}  ${bar}  ${foo}")
+    index.update("b", "${bar}  @{baz}")
+    assert sorted(index) == ["${bar}", "${foo}", "@{baz}"]
+    index.update("a", "${foo}")
+    assert sorted(index) == ["${bar}", "${foo}", "@{baz}"]
+    index.remove("b")
+    assert sorted(index) == ["${foo}"]
+    index.remove("a")
+    index.remove("c")
+    assert len(index) == 0
+
+
+def test_search_index_lookup_and_cache():
+    index = SearchIndex()
+    index.add("A", "A.Open Browser", KeywordDoc(name="Open Browser"), "Open Browser")
+    index.add("B", "B.Open Browser", KeywordDoc(name="Open Browser"), "Open Browser")
+    assert index.lookup("open browser") == ["A.Open Browser", "B.Open Browser"]
+    assert index.lookup("b.open_browser") == ["B.Open Browser"]
+    assert index.lookup("open") == []
+
+    calls = []
+
+    def factory(keyword):
+        calls.append(keyword)
+        return {"text/plain": keyword.name}
+
+    assert index.get_cached("A.Open Browser", factory) == {"text/plain": "Open Browser"}
+    assert index.get_cached("A.Open Browser", factory) == {"text/plain": "Open Browser"}
+    assert len(calls) == 1
+
+    # Cache is invalidated when the library is indexed again
+    index.add("A", "A.Open Browser", KeywordDoc(name="Open Browser"), "Open Browser")
+    index.get_cached("A.Open Browser", factory)
+    assert len(calls) == 2
+    index.remove("A")
+    assert index.lookup("open browser") == ["B.Open Browser"]
+    assert "A.Open Browser" not in index.cache
+
+
+def test_search_index_cache_factory_runs_without_lock():
+    index = SearchIndex()
+    index.add("A", "A.Open Browser", KeywordDoc(name="Open Browser"), "Open Browser")
+
+    def factory(keyword):
+        # Library is indexed again while documentation is being loaded
+        thread = threading.Thread(
+            target=index.add,
+            args=("A", "A.Open Browser", KeywordDoc(name="Open Browser")),
+        )
+        thread.start()
+        thread.join(timeout=2)
+        assert not thread.is_alive()
+        return {"text/plain": keyword.name}
+
+    assert index.get_cached("A.Open Browser", factory) == {"text/plain": "Open Browser"}
+    assert "A.Open Browser" not in index.cache
+
+
+def test_keywords_are_indexed_in_background(tmp_path, monkeypatch):
+    monkeypatch.setenv("JUPYTER_DATA_DIR", str(tmp_path))
+    catalog = {"index": SearchIndex(), "libraries": [], "queue": IndexingQueue()}
+    listener = RobotKeywordsIndexerListener(catalog)
+    listener.library_import("Collections", {})
+    listener.library_import("NoSuchLibrary", {})
+    listener.library_import("Strings", {"originalName": "String"})
+    catalog["queue"].join()
+    assert catalog["libraries"] == ["Collections", "NoSuchLibrary", "Strings"]
+    assert catalog["index"].lookup("collections.append to list")
+    assert catalog["index"].lookup("strings.get line count")
+
+
+def test_indexing_errors_are_logged(caplog):
+    def fail():
+        raise ValueError("Expected failure")
+
+    queue = IndexingQueue(logging.getLogger("robotkernel.test"))
+    queue.put(fail)
+    queue.join()
+    assert "Indexing with fail failed" in caplog.text
+    assert "Expected failure" in caplog.text
+
+
+def test_completion_cache_narrows_previous_results():
+    index = SearchIndex()
+    for name in ["Click Button", "Click Element", "Include Tags", "Close Browser"]:
+        index.add("A", f"A.{name}", KeywordDoc(name=name), name)
+    cache = CompletionCache(index)
+    for query in ["c", "cl", "cli", "clic", "click", "click b", "click bu", "x"]:
+        assert sorted(cache.search(query)) == sorted(index.search(query))
+    assert (cache.hits, cache.misses) == (4, 4)
+    assert cache.search("xy") == []
+    index.add("A", "A.Xylophone", KeywordDoc(name="Xylophone"), "Xylophone")
+    assert cache.search("xyl") == ["A.Xylophone"]
+    assert (cache.hits, cache.misses) == (5, 5)
+    assert cache.hit_rate == 0.5
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+from robotkernel.index import SearchIndex
+from robotkernel.libdocs import get_library_documentation
+from robotkernel.libdocs import KeywordRecord
+from robotkernel.listeners import RobotKeywordsIndexerListener
+from robotkernel.monkeypatches import exec_code_into_module
+from robotkernel.utils import get_keyword_doc
+import os
+import sys
+
+
+LIBRARY = """\
+def hello_world(name):
+    \"\"\"Say hello.\"\"\"
+"""
+
+
+def test_library_documentation_is_cached(tmp_path, monkeypatch):
+    monkeypatch.setenv("JUPYTER_DATA_DIR", str(tmp_path / "data"))
+    library = tmp_path / "HelloLibrary.py"
+    library.write_text(LIBRARY)
+    os.utime(library, (1000, 1000))
+
+    lib_doc = get_library_documentation(str(library))
+    assert [keyword.name for keyword in lib_doc.keywords] == ["Hello World"]
+    assert lib_doc.keywords[0].args == ["name"]
+    assert len(os.listdir(tmp_path / "data" / "robotkernel" / "libdocs")) == 1
+
+    # Cached documentation is used while the source is not modified
+    library.write_text(LIBRARY.replace("hello_world", "goodbye_world"))
+    os.utime(library, (1000, 1000))
+    lib_doc = get_library_documentation(str(library))
+    assert [keyword.name for keyword in lib_doc.keywords] == ["Hello World"]
+    assert lib_doc.keywords[0].args == ["name"]
+    assert lib_doc.keywords[0].doc == "Say hello."
+
+    # Cache is refreshed when the source is modified
+    os.utime(library, (2000, 2000))
+    sys.modules.pop("HelloLibrary", None)
+    lib_doc = get_library_documentation(str(library))
+    assert [keyword.name for keyword in lib_doc.keywords] == ["Goodbye World"]
+
+
+def test_keyword_records_load_documentation_lazily(tmp_path, monkeypatch):
+    monkeypatch.setenv("JUPYTER_DATA_DIR", str(tmp_path / "data"))
+    library = tmp_path / "LazyLibrary.py"
+    library.write_text(LIBRARY)
+    catalog = {"index": SearchIndex(), "libraries": []}
+    listener = RobotKeywordsIndexerListener(catalog)
+    # noinspection PyProtectedMember
+    listener._library_documentation_import(str(library), "Lazy")
+
+    record = catalog["index"]["Lazy.Hello World"]
+    assert isinstance(record, KeywordRecord)
+    assert not hasattr(record, "__dict__")
+    assert record.args == ("name",)
+    assert record.doc == "Say hello."
+    assert record.library.docs == {"Hello World": "Say hello."}
+    assert "Say hello." in get_keyword_doc(record)["text/plain"]
+
+
+def test_keyword_records_without_source_keep_documentation(tmp_path, monkeypatch):
+    monkeypatch.setenv("JUPYTER_DATA_DIR", str(tmp_path / "data"))
+    exec_code_into_module(LIBRARY, "InlineLibrary")
+    catalog = {"index": SearchIndex(), "libraries": []}
+    listener = RobotKeywordsIndexerListener(catalog)
+    # noinspection PyProtectedMember
+    listener._library_documentation_import("InlineLibrary", "InlineLibrary")
+
+    record = catalog["index"]["InlineLibrary.Hello World"]
+    assert record.library.source is None
+    assert record.doc == "Say hello."
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from io import StringIO
+from robotkernel.builders import build_suite
+from robotkernel.listeners import RobotSessionListener
+from robotkernel.listeners import set_webdrivers
+from robotkernel.monkeypatches import keep_imported_libraries
+import sys
+import types
+
+
+COUNTER_LIBRARY = """\
+class CounterLibrary:
+    ROBOT_LIBRARY_SCOPE = "SUITE"
+
+    def __init__(self):
+        self.value = 0
+
+    def increment_counter(self):
+        self.value += 1
+        return self.value
+"""
+
+TEST_SUITE = """\
+*** Settings ***
+
+Library  CounterLibrary.CounterLibrary
+
+*** Tasks ***
+
+Increment
+    ${value}=  Increment counter
+    Should be equal as integers  ${value}  {expected}
+"""
+
+
+def run(expected, session):
+    suite = build_suite(TEST_SUITE.replace("{expected}", str(expected)), {})
+    listeners = session and [RobotSessionListener()] or []
+    with keep_imported_libraries(session):
+        result = suite.run(output=None, stdout=StringIO(), listener=listeners)
+    return result.statistics.total.critical.failed == 0
+
+
+def test_session_keeps_suite_scoped_library_instances():
+    sys.modules["CounterLibrary"] = types.ModuleType("CounterLibrary")
+    exec(COUNTER_LIBRARY, sys.modules["CounterLibrary"].__dict__)
+    try:
+        assert run(1, False)
+        assert run(1, False)
+        assert run(1, True)
+        assert run(2, True)
+        assert run(3, True)
+        assert run(1, False)
+    finally:
+        del sys.modules["CounterLibrary"]
+
+
+def test_set_webdrivers_with_kept_and_restored_drivers():
+    kept, restored = object(), object()
+    cache = types.SimpleNamespace(_connections=[kept], _aliases={}, current=kept)
+    drivers = [
+        dict(type="selenium", instance=kept, aliases=["kept"], current=False),
+        dict(type="appium", instance=object(), aliases=["other"], current=False),
+        dict(type="selenium", instance=restored, aliases=["restored"], current=True),
+    ]
+    set_webdrivers(drivers, cache, "selenium")
+    assert cache._connections == [kept, restored]
+    assert cache._aliases == {"kept": 1, "restored": 2}
+    assert cache.current is restored
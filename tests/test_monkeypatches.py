@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from robot.running.signalhandler import STOP_SIGNAL_MONITOR
+from robotkernel.builders import build_suite
+from robotkernel.exceptions import RobotForcedInterrupt
+from robotkernel.monkeypatches import inject_robot_thread_support
+from robotkernel.monkeypatches import interrupt_robot_thread
+import pytest
+import threading
+import time
+
+
+TEST_SUITE = """\
+*** Tasks ***
+
+Log and time out
+    [Timeout]  0.5 seconds
+    Log  Hello from thread
+    Sleep  5 seconds
+"""
+
+
+class MessagesListener:
+    ROBOT_LISTENER_API_VERSION = 2
+
+    def __init__(self):
+        self.messages = []
+
+    def log_message(self, message):
+        self.messages.append(message["message"])
+
+
+def run(listener):
+    inject_robot_thread_support()
+    suite = build_suite(TEST_SUITE, {})
+    result = suite.run(output=None, stdout=StringIO(), listener=[listener])
+    return result.suite.tests[0]
+
+
+def test_robot_runs_outside_main_thread():
+    listener = MessagesListener()
+    with ThreadPoolExecutor(1) as executor:
+        test = executor.submit(run, listener).result()
+    assert test.status == "FAIL"
+    assert "timeout 500 milliseconds exceeded" in test.message
+    assert "Hello from thread" in listener.messages
+
+
+INTERRUPTED_SUITE = """\
+*** Tasks ***
+
+Sleep long
+    Sleep  4 seconds
+
+Not run
+    No operation
+"""
+
+
+def run_interrupted(thread_ids):
+    inject_robot_thread_support()
+    # noinspection PyProtectedMember
+    STOP_SIGNAL_MONITOR._signal_count = 0
+    thread_ids.append(threading.get_ident())
+    suite = build_suite(INTERRUPTED_SUITE, {})
+    return suite.run(output=None, stdout=StringIO()).suite.tests
+
+
+def test_interrupt_stops_running_keyword():
+    thread_ids = []
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(run_interrupted, thread_ids)
+        time.sleep(0.5)
+        started = time.time()
+        interrupt_robot_thread(thread_ids[0])
+        tests = future.result()
+    assert time.time() - started < 2
+    assert tests[0].status == "FAIL"
+    assert tests[0].message == "Execution terminated by signal"
+    assert tests[1].status == "FAIL"
+
+
+def busy_loop(thread_ids):
+    thread_ids.append(threading.get_ident())
+    while True:
+        time.sleep(0.01)
+
+
+def test_repeated_interrupt_stops_forcefully():
+    # noinspection PyProtectedMember
+    STOP_SIGNAL_MONITOR._signal_count = 0
+    thread_ids = []
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(busy_loop, thread_ids)
+        time.sleep(0.1)
+        interrupt_robot_thread(thread_ids[0])
+        time.sleep(0.1)
+        assert not future.done()
+        interrupt_robot_thread(thread_ids[0])
+        with pytest.raises(RobotForcedInterrupt):
+            future.result(timeout=2)
+
+
+STUBBORN_SUITE = """\
+*** Settings ***
+Library  {library}
+
+*** Tasks ***
+
+Ignore interrupts
+    Ignore Errors
+"""
+
+
+def run_stubborn(thread_ids, library):
+    inject_robot_thread_support()
+    # noinspection PyProtectedMember
+    STOP_SIGNAL_MONITOR._signal_count = 0
+    thread_ids.append(threading.get_ident())
+    suite = build_suite(STUBBORN_SUITE.format(library=library), {})
+    return suite.run(output=None, stdout=StringIO())
+
+
+def test_repeated_interrupt_is_not_caught_by_keywords(tmp_path):
+    library = tmp_path / "StubbornLibrary.py"
+    library.write_text(
+        "import time\n\n"
+        "def ignore_errors():\n"
+        "    while True:\n"
+        "        try:\n"
+        "            time.sleep(0.01)\n"
+        "        except Exception:\n"
+        "            pass\n"
+    )
+    thread_ids = []
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(run_stubborn, thread_ids, library)
+        time.sleep(0.5)
+        interrupt_robot_thread(thread_ids[0])
+        time.sleep(0.1)
+        assert not future.done()
+        interrupt_robot_thread(thread_ids[0])
+        with pytest.raises(RobotForcedInterrupt):
+            future.result(timeout=2)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from io import StringIO
+from robot.api import ExecutionResult
+from robotkernel.builders import build_suite
+from robotkernel.results import RobotResults
+from robotkernel.results import ScreenshotStore
+from tempfile import TemporaryDirectory
+import os
+import pytest
+
+
+TEST_SUITE = """\
+*** Tasks ***
+
+Log message
+    Log  Hello World
+"""
+
+
+def add_result(results):
+    suite = build_suite(TEST_SUITE, {})
+    with TemporaryDirectory() as path:
+        suite.run(outputdir=path, stdout=StringIO())
+        return results.add(ExecutionResult(os.path.join(path, "output.xml")))
+
+
+def test_results_are_rendered_on_demand():
+    results = RobotResults(size=1)
+    first = add_result(results)
+    second = add_result(results)
+    assert list(results.results) == [second]
+    with pytest.raises(KeyError):
+        results.render(first, "log.html")
+    log = results.render(second, "log.html")
+    assert b"Hello World" in log
+    assert b'"reportURL":null' in log
+    report = results.render(second, "report.html")
+    assert b'"logURL":null' in report
+    assert b"Hello World" in results.render(second, "log.html")
+    results.cleanup()
+    assert not results.results
+
+
+def test_screenshot_store_is_bounded():
+    store = ScreenshotStore(size=8)
+    store.add("a", "image/png", "aaaa", (1, 1))
+    store.add("b", "image/png", "bbbb", (1, 1))
+    assert store.get("a") == ("a", "image/png", "aaaa", (1, 1))
+    store.add("c", "image/png", "cccc", (1, 1))
+    assert store.get("b") is None
+    assert list(store.screenshots) == ["a", "c"]
+    assert store.length == 8
+
+
+def test_results_are_bounded_by_length():
+    results = RobotResults(length=10)
+    first = results.add(object(), 6)
+    second = results.add(object(), 4)
+    assert list(results.results) == [first, second]
+    third = results.add(object(), 12)
+    assert list(results.results) == [third]
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+from robotkernel.selectors import clear_selector_highlights
+from robotkernel.selectors import get_appium_selector_completions
+from robotkernel.selectors import get_selector_scripts
+from robotkernel.selectors import get_selenium_selector_completions
+from robotkernel.selectors import SELECTOR_CANDIDATES_SCRIPT
+from robotkernel.selectors import SELECTOR_HIGHLIGHT_SCRIPT
+from robotkernel.selectors import SelectorCache
+import pytest
+
+
+class SeleniumDriver:
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.calls = []
+        self.queries = []
+        self.url = "http://localhost/"
+        self.mutations = 0
+        self.version = None
+
+    def execute_script(self, script, *args):
+        self.calls.append(script)
+        if script == get_selector_scripts()[1]:
+            self.version = get_selector_scripts()[0]
+        elif script == SELECTOR_CANDIDATES_SCRIPT:
+            version, cached, queries, strategy, simmer = args
+            state = [self.url, self.mutations]
+            if version != self.version:
+                return {"state": None, "candidates": None}
+            elif cached == state:
+                return {"state": state, "candidates": None}
+            self.queries.append((queries, strategy, simmer))
+            return {"state": state, "candidates": self.candidates}
+        elif script == SELECTOR_HIGHLIGHT_SCRIPT:
+            return len(args[0])
+
+
+def candidate(element, displayed=True, id="", name="", tag="div", text="", simmer=""):
+    return dict(
+        element=element,
+        displayed=displayed,
+        id=id,
+        name=name,
+        tag=tag,
+        text=text,
+        simmer=simmer,
+    )
+
+
+def test_selenium_css_selector_completions_in_single_query():
+    driver = SeleniumDriver(
+        [
+            candidate(1, id="main"),
+            candidate(2, name="q", tag="input"),
+            candidate(3, tag="a", text="Home"),
+            candidate(4, simmer="div > p"),
+            candidate(5, id="hidden", displayed=False),
+        ]
+        * 100
+    )
+    matches = get_selenium_selector_completions("css:.item", driver)
+    assert matches[:4] == ["id:main", "name:q", "link:Home", "id:main"]
+    assert len(matches) == 400
+    assert matches[-1] == "css:div > p"
+    assert driver.queries == [([".item"], "css", 1)]
+    assert len(driver.calls) == 4  # query, inject, query and highlight
+
+    # Helper scripts are injected only once per document
+    get_selenium_selector_completions("css:.item", driver)
+    assert len(driver.calls) == 6  # query and highlight
+
+
+def test_selenium_id_selector_completions_include_hidden_without_visible():
+    driver = SeleniumDriver([candidate(1, id="hidden", displayed=False)])
+    assert get_selenium_selector_completions("id:hid", driver) == ["id:hidden"]
+
+
+def test_selenium_selector_candidates_are_cached_per_document():
+    driver = SeleniumDriver(
+        [candidate(1, id="username"), candidate(2, id="user"), candidate(3, id="pw")]
+    )
+    cache = SelectorCache()
+    assert get_selenium_selector_completions("id:", driver, cache) == [
+        "id:username",
+        "id:user",
+        "id:pw",
+    ]
+    assert get_selenium_selector_completions("id:u", driver, cache) == [
+        "id:username",
+        "id:user",
+    ]
+    assert get_selenium_selector_completions("id:user", driver, cache) == ["id:user"]
+    assert driver.queries == [(["[id]"], "css", 0)]
+
+    # Snapshot is refreshed when document is mutated
+    driver.mutations += 1
+    get_selenium_selector_completions("id:user", driver, cache)
+    assert len(driver.queries) == 2
+
+    # Snapshot is refreshed when page is navigated
+    driver.url = "http://localhost/login"
+    driver.mutations = 0
+    get_selenium_selector_completions("id:user", driver, cache)
+    assert len(driver.queries) == 3
+
+
+def test_selector_highlights_are_cleared_only_when_highlighted():
+    driver = SeleniumDriver([candidate(1, id="user")])
+    cache = SelectorCache()
+    clear_selector_highlights(driver, cache)
+    assert driver.calls == []
+
+    get_selenium_selector_completions("id:", driver, cache)
+    calls = len(driver.calls)
+    clear_selector_highlights(driver, cache)
+    assert len(driver.calls) == calls + 1
+    clear_selector_highlights(driver, cache)
+    assert len(driver.calls) == calls + 1
+
+
+PAGE_SOURCE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<hierarchy rotation="0">
+  <android.widget.FrameLayout class="android.widget.FrameLayout" displayed="true">
+    <android.widget.EditText class="android.widget.EditText" displayed="true"
+        resource-id="com.example:id/username" text="" />
+    <android.widget.EditText class="android.widget.EditText" displayed="false"
+        resource-id="com.example:id/password" text="" />
+    <android.widget.Button class="android.widget.Button" displayed="true"
+        text="Sign in" />
+  </android.widget.FrameLayout>
+</hierarchy>
+"""
+
+
+class AppiumElement:
+    def __init__(self, **attributes):
+        self.attributes = attributes
+
+    def get_attribute(self, name):
+        return self.attributes.get(name)
+
+    def is_displayed(self):
+        return True
+
+
+class AppiumDriver:
+    def __init__(self, page_source=PAGE_SOURCE):
+        self.page_source_requests = 0
+        self._page_source = page_source
+        self.remote_queries = []
+
+    @property
+    def page_source(self):
+        self.page_source_requests += 1
+        return self._page_source
+
+    def find_elements_by_xpath(self, xpath):
+        self.remote_queries.append(xpath)
+        return [AppiumElement(**{"class": "android.widget.Button", "text": "Sign in"})]
+
+
+def test_appium_selector_completions_from_page_source_snapshot():
+    driver = AppiumDriver()
+    cache = SelectorCache()
+    assert get_appium_selector_completions("id:", driver, cache) == [
+        'xpath=//*[@resource-id="com.example:id/username"]'
+    ]
+    assert get_appium_selector_completions("id:pass", driver, cache) == [
+        'xpath=//*[@resource-id="com.example:id/password"]'
+    ]
+    assert get_appium_selector_completions("xpath:Sign", driver, cache) == [
+        'xpath=//android.widget.Button[@text="Sign in"]'
+    ]
+    assert get_appium_selector_completions(
+        "xpath=//android.widget.Button", driver, cache
+    ) == ['xpath=//android.widget.Button[@text="Sign in"]']
+    assert driver.page_source_requests == 1
+    assert driver.remote_queries == []
+
+    # Snapshot is refreshed after cells have been executed
+    cache.clear_snapshots()
+    get_appium_selector_completions("id:", driver, cache)
+    assert driver.page_source_requests == 2
+
+
+def test_appium_selector_completions_with_malformed_page_source():
+    driver = AppiumDriver(PAGE_SOURCE[:-20])
+    assert get_appium_selector_completions("id:", driver, SelectorCache()) == []
+
+
+@pytest.mark.parametrize(
+    "xpath",
+    ["(//android.widget.Button)[1]", "//a | //android.widget.Button", "//a[@x>1]"],
+)
+def test_appium_xpath_selector_completions_fall_back_to_driver(xpath):
+    driver = AppiumDriver()
+    assert get_appium_selector_completions(f"xpath={xpath}", driver) == [
+        'xpath=//android.widget.Button[@text="Sign in"]'
+    ]
+    assert driver.remote_queries == [xpath]
@@ -1,5 +1,10 @@
 # -*- coding: utf-8 -*-
+from difflib import SequenceMatcher
+from operator import itemgetter
 from robotkernel.utils import detect_robot_context
+from robotkernel.utils import longest_common_substring
+from robotkernel.utils import scored_results
+import random
 
 
 def test_detect_robot_context_root():
@@ -95,3 +100,33 @@ This is a task
 # *** Keywords ***
 # """, -1
 #     ) == '__keywords__'
+
+
+def legacy_scored_results(needle, results):
+    results = [dict(result) for result in results]
+    for result in results:
+        match = SequenceMatcher(
+            None, needle.lower(), result["ref"].lower(), autojunk=False
+        ).find_longest_match(0, len(needle), 0, len(result["ref"]))
+        result["score"] = (match.size, match.size / float(len(result["ref"])))
+    return list(reversed(sorted(results, key=itemgetter("score"))))
+
+
+def test_longest_common_substring():
+    assert longest_common_substring("", "abc") == 0
+    assert longest_common_substring("abc", "") == 0
+    assert longest_common_substring("xbcx", "abcd") == 2
+    assert longest_common_substring("open browser", "open browser") == 12
+
+
+def test_scored_results_ordering():
+    rnd = random.Random(0)
+    words = ["open", "close", "browser", "page", "click", "element", "ab"]
+    results = [
+        {"ref": " ".join(rnd.choice(words) for _ in range(rnd.randint(1, 3)))}
+        for _ in range(500)
+    ]
+    for needle in ["o", "op", "Open B", "lement", "xyz", "ab ab"]:
+        expected = legacy_scored_results(needle, results)
+        assert scored_results(needle, results) == expected
+        assert scored_results(needle, results, limit=10) == expected[:10]